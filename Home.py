@@ -1,6 +1,7 @@
 import streamlit as st
 from app.services.user_service import register_user, login_user
-from app.data.users import get_user_by_username
+from app.data.users import username_exists
+from services.password_hasher import HasherBusyError
 
 st.set_page_config(page_title="Login / Register",
                    page_icon="🔒", layout="centered")
@@ -34,7 +35,12 @@ with tab_login:
 
     if st.button("Log in", type="primary"):
         # Check credentials against database
-        if login_user(login_username, login_password):
+        try:
+            logged_in = login_user(login_username, login_password)
+        except HasherBusyError:
+            st.warning("Too many sign-ins in progress. Please try again in a moment.")
+            st.stop()
+        if logged_in:
             st.session_state.logged_in = True
             st.session_state.username = login_username
             st.success(f"Welcome back, {login_username}! ")
@@ -58,11 +64,16 @@ with tab_register:
             st.warning("Please fill in all fields.")
         elif new_password != confirm_password:
             st.error("Passwords do not match.")
-        elif get_user_by_username(new_username):
+        elif username_exists(new_username):
             st.error("Username already exists. Choose another one.")
         else:
             # Create user in database
-            if register_user(new_username, new_password):
+            try:
+                registered = register_user(new_username, new_password)
+            except HasherBusyError:
+                st.warning("The server is busy. Please try again in a moment.")
+                st.stop()
+            if registered:
                 st.success(
                     "Account created! You can now log in from the Login tab.")
                 st.info(
@@ -0,0 +1,203 @@
+import pandas as pd
+from app.data.cache import cached_call
+
+# Breakdowns of ticket resolution time ('' is all resolved tickets)
+RESOLUTION_DIMENSIONS = ["", "priority", "category", "assigned_to"]
+
+# Days within which a ticket of each priority should be resolved
+SLA_TARGET_DAYS = {
+    "Critical": 1,
+    "High": 3,
+    "Medium": 7,
+    "Low": 14,
+}
+
+# Histogram of whole days from created_date to resolved_date. Holding the
+# priority with every bucket lets SLA compliance be computed for any
+# breakdown; the table grows with distinct durations, not with tickets.
+RESOLUTION_TIMES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS resolution_times (
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        days INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, value, priority, days)
+    ) WITHOUT ROWID
+"""
+
+# Resolution time of one it_tickets row, from the indexed epoch-day columns
+RESOLUTION_DAYS = "{row}resolved_date_day - {row}created_date_day"
+
+
+def _histogram_statements(row, delta):
+    """Upserts that add `delta` to the histogram buckets of ticket `row` (NEW/OLD)."""
+    days = RESOLUTION_DAYS.format(row=f"{row}.")
+    statements = []
+    for dimension in RESOLUTION_DIMENSIONS:
+        value = f"IFNULL({row}.{dimension}, '')" if dimension else "''"
+        statements.append(f"""
+            INSERT INTO resolution_times (dimension, value, priority, days, count)
+            SELECT '{dimension}', {value}, IFNULL({row}.priority, ''), {days}, {delta}
+            WHERE {days} >= 0
+            ON CONFLICT (dimension, value, priority, days)
+            DO UPDATE SET count = count + ({delta});""")
+    return "".join(statements)
+
+
+def resolution_trigger_sql():
+    """
+    Build the it_tickets triggers that keep the resolution histogram current.
+
+    resolve_ticket() and any other write that sets resolved_date update the
+    histogram in the same transaction, so statistics never need a rescan.
+
+    Returns:
+        list: CREATE TRIGGER statements
+    """
+    watched = ["assigned_to", "category", "created_date", "priority", "resolved_date"]
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_it_tickets_resolution_insert
+        AFTER INSERT ON it_tickets BEGIN{_histogram_statements("NEW", 1)}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_it_tickets_resolution_delete
+        AFTER DELETE ON it_tickets BEGIN{_histogram_statements("OLD", -1)}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_it_tickets_resolution_update
+        AFTER UPDATE OF {', '.join(watched)} ON it_tickets BEGIN{_histogram_statements("OLD", -1)}{_histogram_statements("NEW", 1)}
+        END""",
+    ]
+
+
+def create_resolution_objects(cursor):
+    """Create the resolution histogram and its triggers (no commit)."""
+    cursor.execute(RESOLUTION_TIMES_TABLE_SQL)
+    for sql in resolution_trigger_sql():
+        cursor.execute(sql)
+
+
+def rebuild_resolution_times(cursor):
+    """Recompute the resolution histogram from it_tickets (no commit)."""
+    days = RESOLUTION_DAYS.format(row="")
+    cursor.execute("DELETE FROM resolution_times")
+    for dimension in RESOLUTION_DIMENSIONS:
+        value = f"IFNULL({dimension}, '')" if dimension else "''"
+        cursor.execute(f"""
+            INSERT INTO resolution_times (dimension, value, priority, days, count)
+            SELECT '{dimension}', {value}, IFNULL(priority, ''), {days}, COUNT(*)
+            FROM it_tickets
+            WHERE {days} >= 0
+            GROUP BY 2, 3, 4
+        """)
+
+
+def add_resolution_range(cursor, first_id, last_id):
+    """
+    Add it_tickets rows first_id..last_id to the resolution histogram (no commit).
+
+    The set-based equivalent of the insert trigger, for rows bulk-loaded
+    with it dropped (see db.bulk_insert).
+    """
+    days = RESOLUTION_DAYS.format(row="")
+    for dimension in RESOLUTION_DIMENSIONS:
+        value = f"IFNULL({dimension}, '')" if dimension else "''"
+        cursor.execute(f"""
+            INSERT INTO resolution_times (dimension, value, priority, days, count)
+            SELECT '{dimension}', {value}, IFNULL(priority, ''), {days}, COUNT(*)
+            FROM it_tickets
+            WHERE id BETWEEN ? AND ? AND {days} >= 0
+            GROUP BY 2, 3, 4
+            ON CONFLICT (dimension, value, priority, days)
+            DO UPDATE SET count = count + excluded.count
+        """, (first_id, last_id))
+
+
+def resolution_stats(histogram):
+    """
+    Summarise a resolution-time histogram per value, without per-row Python.
+
+    Percentiles use the nearest-rank method, so they are always a
+    duration some ticket actually took.
+
+    Args:
+        histogram: DataFrame with value, priority, days and count columns
+
+    Returns:
+        pandas.DataFrame: value, tickets, mean_days, median_days, p90_days
+            and within_sla (share of tickets resolved within their
+            priority's SLA_TARGET_DAYS; NaN when no target applies)
+    """
+    columns = ["value", "tickets", "mean_days", "median_days", "p90_days", "within_sla"]
+    histogram = histogram[histogram["count"] > 0]
+    if histogram.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Collapse priorities for the percentiles; keep them for the SLA share
+    by_days = (histogram.groupby(["value", "days"], as_index=False)["count"].sum()
+               .sort_values(["value", "days"]))
+    groups = by_days.groupby("value")["count"]
+    rank = groups.cumsum() / groups.transform("sum")
+
+    target = histogram["priority"].map(SLA_TARGET_DAYS)
+    histogram = histogram.assign(
+        total_days=histogram["days"] * histogram["count"],
+        has_target=target.notna() * histogram["count"],
+        met=(histogram["days"] <= target) * histogram["count"])
+
+    stats = histogram.groupby("value").agg(
+        tickets=("count", "sum"), total_days=("total_days", "sum"),
+        has_target=("has_target", "sum"), met=("met", "sum"))
+    stats["mean_days"] = stats["total_days"] / stats["tickets"]
+    stats["median_days"] = by_days[rank >= 0.5].groupby("value")["days"].first()
+    stats["p90_days"] = by_days[rank >= 0.9].groupby("value")["days"].first()
+    stats["within_sla"] = stats["met"] / stats["has_target"].where(stats["has_target"] > 0)
+    return stats.reset_index()[columns].sort_values("tickets", ascending=False,
+                                                    ignore_index=True)
+
+
+def read_resolution_stats(conn, by=None):
+    """
+    Resolution-time statistics of resolved tickets, computed from the histogram.
+
+    Results are cached until it_tickets next changes.
+
+    Args:
+        conn: Database connection
+        by: None for all tickets, or "priority", "category" or "assigned_to"
+
+    Returns:
+        pandas.DataFrame: The `by` column (or one unlabelled row for None),
+            tickets, mean_days, median_days, p90_days and within_sla
+    """
+    dimension = by or ""
+    if dimension not in RESOLUTION_DIMENSIONS:
+        raise ValueError(f"Cannot break resolution times down by {by}")
+
+    def compute():
+        histogram = pd.read_sql_query("""
+            SELECT value, priority, days, count
+            FROM resolution_times
+            WHERE dimension = ?
+        """, conn, params=(dimension,))
+        stats = resolution_stats(histogram)
+        if not by:
+            return stats.drop(columns="value")
+        stats["value"] = stats["value"].where(stats["value"] != "")
+        return stats.rename(columns={"value": by})
+
+    return cached_call(conn, ("read_resolution_stats", dimension), ("it_tickets",), compute)
+
+
+def main():
+    """Rebuild the resolution histogram of the platform database."""
+    from app.data.db import connect_database, transaction
+
+    conn = connect_database()
+    with transaction(conn):
+        rebuild_resolution_times(conn.cursor())
+    conn.close()
+    print("✅ Resolution times rebuilt successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import sys
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# Tables whose writes bump a version counter in table_versions
+VERSIONED_TABLES = ["cyber_incidents", "it_tickets", "datasets_metadata", "users"]
+
+# Default bounds for the shared cache
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# table_versions row holding a random id chosen when the database is
+# created, so a database rebuilt at the same path never reuses cache keys
+DATABASE_ID_KEY = "__database_id__"
+
+TABLE_VERSIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS table_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+
+def create_version_objects(cursor):
+    """Create table_versions and the triggers that bump it (no commit)."""
+    cursor.execute(TABLE_VERSIONS_TABLE_SQL)
+    for table in VERSIONED_TABLES:
+        cursor.execute(
+            "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)",
+            (table,)
+        )
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET version = version + 1
+                    WHERE table_name = '{table}';
+                END
+            """)
+
+
+def create_database_id(cursor):
+    """Give the database its random identity in table_versions (no commit)."""
+    cursor.execute(TABLE_VERSIONS_TABLE_SQL)
+    cursor.execute(
+        "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, abs(random()))",
+        (DATABASE_ID_KEY,)
+    )
+
+
+class QueryCache:
+    """
+    Size-bounded LRU cache for read results.
+
+    Entries are keyed by the caller's key plus the database's identity and
+    the current version of every table the result depends on, so any
+    committed write to one of those tables - from this process or another -
+    makes old entries unreachable. Reads made inside an open transaction
+    bypass the cache: they may see uncommitted versions that a rollback
+    would later hand out again.
+    Cached DataFrames are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, conn, key, tables, compute):
+        """
+        Return the cached value for `key`, computing and storing it on a miss.
+
+        Args:
+            conn: Database connection used to read table versions
+            key: Hashable description of the query (e.g. SQL and params)
+            tables: Tables the result is derived from
+            compute: Zero-argument callable producing the value
+        """
+        if conn.in_transaction:
+            return compute()
+
+        full_key = (key, table_versions(conn, tables))
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = compute()
+        self._store(full_key, value, _estimate_size(value))
+        return value
+
+    def clear(self):
+        """Drop every entry and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, evictions, entries and bytes held
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _store(self, full_key, value, size):
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(full_key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[full_key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+
+def bump_table_version(cursor, table):
+    """Mark `table` as changed, as its version triggers do (no commit)."""
+    cursor.execute(
+        "UPDATE table_versions SET version = version + 1 WHERE table_name = ?", (table,))
+
+
+def table_versions(conn, tables):
+    """
+    Return the database's file and identity and the current version of each
+    table, as a tuple.
+
+    Returns:
+        tuple: (database file, database id, ((table, version), ...)); the
+            id is None for a database migrated before it was introduced
+    """
+    placeholders = ", ".join("?" for _ in tables)
+    rows = conn.execute(f"""
+        SELECT (SELECT file FROM pragma_database_list WHERE name = 'main'),
+               table_name, version
+        FROM table_versions
+        WHERE table_name IN (?, {placeholders})
+        ORDER BY table_name
+    """, (DATABASE_ID_KEY, *tables)).fetchall()
+    db_file = rows[0][0] if rows else None
+    database_id = next((row[2] for row in rows if row[1] == DATABASE_ID_KEY), None)
+    return db_file, database_id, tuple((row[1], row[2]) for row in rows
+                                       if row[1] != DATABASE_ID_KEY)
+
+
+def _estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return sys.getsizeof(value)
+
+
+_query_cache = QueryCache()
+
+
+def cached_call(conn, key, tables, compute):
+    """Memoise `compute()` in the shared cache; see QueryCache.get_or_compute."""
+    return _query_cache.get_or_compute(conn, key, tables, compute)
+
+
+def read_sql_cached(query, conn, tables, params=()):
+    """
+    pd.read_sql_query with results memoised per SQL, params and table versions.
+
+    Args:
+        query: SQL text
+        conn: Database connection
+        tables: Tables the query reads (their versions invalidate the entry)
+        params: Query parameters
+
+    Returns:
+        pandas.DataFrame: Query result (shared; treat as read-only)
+    """
+    params = tuple(params)
+    return cached_call(conn, ("sql", query, params), tables,
+                       lambda: pd.read_sql_query(query, conn, params=params))
+
+
+def get_cache_stats():
+    """Hit/miss/eviction statistics of the shared query cache."""
+    return _query_cache.stats()
+
+
+def clear_query_cache():
+    """Empty the shared query cache."""
+    _query_cache.clear()
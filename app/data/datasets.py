@@ -1,5 +1,16 @@
-import pandas as pd
-from app.data.db import connect_database
+from app.data.cache import cached_call, read_sql_cached
+from app.data.db import BULK_BATCH_SIZE, bulk_insert, use_connection
+from app.data.frames import read_table_compact
+from app.data.pagination import ITER_BATCH_SIZE, PAGE_SIZE, fetch_page, iter_models
+from app.data.summaries import read_summary_counts, read_summary_totals, read_summary_values
+from models.dataset import Dataset
+
+# Insert order used by the bulk API
+DATASET_COLUMNS = ("dataset_name", "category", "source", "last_updated", "record_count",
+                   "file_size_mb")
+
+# Columns the raw-data explorer may filter on
+DATASET_FILTERS = ("category", "source")
 
 
 def insert_dataset(conn, dataset_name, category, source, last_updated, record_count, file_size_mb):
@@ -7,6 +18,7 @@ def insert_dataset(conn, dataset_name, category, source, last_updated, record_co
     Insert a new dataset into the database.
 
     Args:
+        conn: Database connection (None to use the shared pool)
         dataset_name: Name of the dataset
         category: Category (e.g., 'Threat Intelligence', 'Network Logs')
         source: Origin of the dataset
@@ -17,64 +29,139 @@ def insert_dataset(conn, dataset_name, category, source, last_updated, record_co
     Returns:
         int: ID of the inserted dataset
     """
-    conn = connect_database()
-    cursor = conn.cursor()
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            INSERT INTO datasets_metadata 
+            (dataset_name, category, source, last_updated, record_count, file_size_mb)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (dataset_name, category, source, last_updated, record_count, file_size_mb))
 
-    cursor.execute("""
-        INSERT INTO datasets_metadata 
-        (dataset_name, category, source, last_updated, record_count, file_size_mb)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (dataset_name, category, source, last_updated, record_count, file_size_mb))
+        conn.commit()
+        return cursor.lastrowid
 
-    conn.commit()
-    dataset_id = cursor.lastrowid
-    conn.close()
 
-    return dataset_id
+def insert_datasets_bulk(conn, datasets, batch_size=BULK_BATCH_SIZE):
+    """
+    Insert many datasets in a single transaction.
 
+    Args:
+        conn: Database connection (None to use the shared pool)
+        datasets: DataFrame, or iterable of tuples in DATASET_COLUMNS order
+            (or dicts keyed by column name); generators are streamed
+        batch_size: Rows sent to each executemany call
 
-def get_all_datasets(conn):
+    Returns:
+        range: IDs of the inserted datasets
+    """
+    with use_connection(conn) as conn:
+        return bulk_insert(conn, "datasets_metadata", DATASET_COLUMNS, datasets, batch_size)
+
+
+def get_all_datasets(conn, compact=False, arrow=False):
     """
     Get all datasets as DataFrame.
 
+    Args:
+        conn: Database connection (None to use the shared pool)
+        compact: Return a memory-lean frame (categoricals, downcast numbers,
+            datetime dates); see app.data.frames.compact_frame
+        arrow: With compact, also use pyarrow-backed dtypes
+
     Returns:
-        pandas.DataFrame: All datasets ordered by ID descending
+        pandas.DataFrame: All datasets ordered by ID descending (a private copy that is safe
+            to modify)
+    """
+    query = "SELECT * FROM datasets_metadata"
+    with use_connection(conn) as conn:
+        if compact:
+            return read_table_compact(query, conn, "datasets_metadata", arrow).copy()
+        return read_sql_cached(query, conn, ("datasets_metadata",)).copy()
+
+
+def get_datasets_page(conn, filters=None, sort_by="id", descending=True, cursor=None,
+                      page_size=PAGE_SIZE):
+    """
+    Fetch one page of datasets for the raw-data explorer.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        filters: Dict with any of category, source (a value
+            or list of values), plus "start"/"end" dates bounding last_updated
+        sort_by: "id" or "last_updated"
+        descending: Newest first when True
+        cursor: next_cursor of the previous page, or None for the first page
+        page_size: Rows per page
+
+    Returns:
+        Page: rows, next_cursor, total and total_is_exact
+    """
+    with use_connection(conn) as conn:
+        return fetch_page(conn, "datasets_metadata", filters, DATASET_FILTERS, "last_updated",
+                          sort_by, descending, cursor, page_size)
+
+
+def iter_datasets(conn, filters=None, batch_size=ITER_BATCH_SIZE):
     """
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM datasets_metadata",
-        conn
-    )
-    conn.close()
-    return df
+    Stream datasets as Dataset objects in id order, without pandas.
+
+    A pooled connection is held until the generator is exhausted or closed.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        filters: Same as get_datasets_page
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        Dataset
+    """
+    with use_connection(conn) as conn:
+        yield from iter_models(conn, "datasets_metadata", Dataset, filters, DATASET_FILTERS,
+                               "last_updated", batch_size)
+
 
 def get_dataset_by_category_count(conn):
     """
     Count datasets by category.
-    Uses: SELECT, FROM, GROUP BY, ORDER BY
+    Reads the trigger-maintained summary_counts table.
     """
-    query = """
-    SELECT category, COUNT(*) as count
-    FROM datasets_metadata
-    GROUP BY category
-    ORDER BY count DESC
-    """
-    df = pd.read_sql_query(query, conn)
-    return df
+    with use_connection(conn) as conn:
+        return read_summary_counts(conn, "datasets_metadata", "category", "category")
 
 def get_dataset_by_source(conn):
     """
     Count datasets by source.
-    Uses: SELECT, FROM, GROUP BY, ORDER BY
+    Reads the trigger-maintained summary_counts table.
     """
-    query = """
-    SELECT source, COUNT(*) as count
-    FROM datasets_metadata
-    GROUP BY source
-    ORDER BY count DESC
+    with use_connection(conn) as conn:
+        return read_summary_counts(conn, "datasets_metadata", "source", "source")
+
+
+def get_dataset_filter_options(conn):
     """
-    df = pd.read_sql_query(query, conn)
-    return df
+    Values offered by the dataset explorer's filters.
+    Reads the trigger-maintained summary_counts table.
+
+    Returns:
+        dict: column -> sorted list of values present in datasets_metadata
+    """
+    with use_connection(conn) as conn:
+        return read_summary_values(conn, "datasets_metadata", ("category", "source"))
+
+
+def get_dataset_kpis(conn):
+    """
+    Headline dataset totals for the dashboard, read from the summary tables.
+
+    Returns:
+        dict: total datasets, summed record_count and summed file_size_mb
+    """
+    with use_connection(conn) as conn:
+        total, record_count, file_size_mb = cached_call(
+            conn, ("get_dataset_kpis",), ("datasets_metadata",),
+            lambda: read_summary_totals(conn, "datasets_metadata"))
+        return {"total": total, "record_count": record_count, "file_size_mb": file_size_mb}
 
 
 def update_dataset_record_count(conn, dataset_id, new_record_count):
@@ -88,19 +175,16 @@ def update_dataset_record_count(conn, dataset_id, new_record_count):
     Returns:
         int: Number of rows affected (1 if successful, 0 if not found)
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "UPDATE datasets_metadata SET record_count = ? WHERE id = ?",
-        (new_record_count, dataset_id)
-    )
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
 
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
+        cursor.execute(
+            "UPDATE datasets_metadata SET record_count = ? WHERE id = ?",
+            (new_record_count, dataset_id)
+        )
 
-    return rows_affected
+        conn.commit()
+        return cursor.rowcount
 
 
 def update_dataset_last_updated(conn, dataset_id, new_date):
@@ -114,19 +198,16 @@ def update_dataset_last_updated(conn, dataset_id, new_date):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
 
-    cursor.execute(
-        "UPDATE datasets_metadata SET last_updated = ? WHERE id = ?",
-        (new_date, dataset_id)
-    )
+        cursor.execute(
+            "UPDATE datasets_metadata SET last_updated = ? WHERE id = ?",
+            (new_date, dataset_id)
+        )
 
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-
-    return rows_affected
+        conn.commit()
+        return cursor.rowcount
 
 
 def delete_dataset(conn, dataset_id):
@@ -139,16 +220,13 @@ def delete_dataset(conn, dataset_id):
     Returns:
         int: Number of rows affected (1 if successful, 0 if not found)
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "DELETE FROM datasets_metadata WHERE id = ?",
-        (dataset_id,)
-    )
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
 
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
+        cursor.execute(
+            "DELETE FROM datasets_metadata WHERE id = ?",
+            (dataset_id,)
+        )
 
-    return rows_affected
+        conn.commit()
+        return cursor.rowcount
@@ -1,18 +1,379 @@
+import csv
+import hashlib
+import queue
 import sqlite3
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
+from urllib.parse import quote
 import pandas as pd
+from app.data.schema import (DATE_COLUMNS, drop_insert_triggers, restore_insert_triggers,
+                             run_migrations)
 
 # Define paths
 DATA_DIR = Path("DATA")
 DB_PATH = DATA_DIR / "intelligence_platform.db"
 
+# CSV files loaded by load_all_csv_data, with their target tables
+CSV_SOURCES = [
+    (DATA_DIR / "cyber_incidents.csv", "cyber_incidents"),
+    (DATA_DIR / "datasets_metadata.csv", "datasets_metadata"),
+    (DATA_DIR / "it_tickets.csv", "it_tickets"),
+]
 
-def connect_database(db_path=DB_PATH):
-    """Connect to SQLite database."""
-    return sqlite3.connect(str(db_path))
+# Connection pool defaults
+POOL_SIZE = 5
+POOL_TIMEOUT = 10.0
 
+# PRAGMA settings applied by connect_database for each named profile.
+# cache_size is negative KiB, mmap_size is bytes, busy_timeout is ms.
+PRAGMA_PROFILES = {
+    "dashboard-read": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -256000,
+        "mmap_size": 1024 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+    "oltp": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+DEFAULT_PROFILE = "oltp"
 
-def load_csv_to_table(conn, csv_path, table_name):
+# Rows handed to each executemany call by bulk_insert
+BULK_BATCH_SIZE = 5000
+
+# Loads of at least this many rows run with the derived-data insert
+# triggers dropped; below it, dropping and recreating them costs more
+BULK_DEFER_TRIGGERS_MIN_ROWS = 500
+
+# CSV files larger than this are streamed in chunks of CSV_CHUNK_ROWS rows
+STREAMING_THRESHOLD_BYTES = 50 * 1024 * 1024
+CSV_CHUNK_ROWS = 50000
+
+# CSV date formats and the ISO-8601 text they are stored as
+CSV_DATE_FORMAT = ("%d/%m/%Y", "%Y-%m-%d")
+CSV_TIMESTAMP_FORMAT = ("%d/%m/%Y %H:%M", "%Y-%m-%d %H:%M:%S")
+
+
+def connect_database(db_path=DB_PATH, profile=DEFAULT_PROFILE, read_only=False,
+                     check_same_thread=True):
+    """
+    Connect to SQLite database.
+
+    Args:
+        db_path: Path to the database file
+        profile: Name of a PRAGMA_PROFILES entry, or None for SQLite defaults
+        read_only: Open through a mode=ro URI so the handle can never write
+        check_same_thread: Passed through to sqlite3.connect
+
+    Returns:
+        sqlite3.Connection: Configured connection
+    """
+    if profile is not None and profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown connection profile: {profile}")
+    pragmas = PRAGMA_PROFILES.get(profile, {})
+    timeout = pragmas.get("busy_timeout", 5000) / 1000
+
+    if read_only:
+        uri = f"file:{quote(Path(db_path).resolve().as_posix())}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=timeout,
+                               check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(str(db_path), timeout=timeout,
+                               check_same_thread=check_same_thread)
+
+    for name, value in pragmas.items():
+        # WAL is persistent and can only be switched on by a writer
+        if name == "journal_mode" and read_only:
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Bounded pool of reusable SQLite connections.
+
+    A thread that already holds a connection gets the same handle back on
+    nested checkouts, so one page render or request uses a single
+    connection no matter how many data helpers it calls.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 profile=DEFAULT_PROFILE, read_only=False):
+        self._db_path = db_path
+        self._profile = profile
+        self._read_only = read_only
+        self._timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._local = threading.local()
+        self._closed = False
+
+    def acquire(self):
+        """
+        Check out a connection for the current thread.
+
+        Returns:
+            sqlite3.Connection: A healthy pooled connection
+
+        Raises:
+            TimeoutError: If no connection frees up within the pool timeout
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        if not self._slots.acquire(timeout=self._timeout):
+            raise TimeoutError(
+                f"No pooled connection available after {self._timeout}s")
+        try:
+            conn = self._take_healthy()
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection checked out with acquire()."""
+        if getattr(self._local, "conn", None) is not conn:
+            raise ValueError("Connection was not checked out by this thread")
+
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        self._local.conn = None
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+        else:
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and back in."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+    def _take_healthy(self):
+        """Reuse an idle connection that still answers, else open a new one."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if self._is_healthy(conn):
+                return conn
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _open(self):
+        # Pooled handles move between threads, but never while in use
+        return connect_database(self._db_path, profile=self._profile,
+                                read_only=self._read_only,
+                                check_same_thread=False)
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_migrated_paths = set()
+
+
+def get_pool(db_path=DB_PATH, profile=DEFAULT_PROFILE, read_only=False):
+    """
+    Return the shared connection pool for a database file and profile.
+
+    The first pool opened on a file brings its schema up to date, so the
+    app works on a fresh checkout whichever page is loaded first.
+    """
+    key = (str(db_path), profile, read_only)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            _ensure_migrated(db_path)
+            pool = ConnectionPool(db_path, profile=profile, read_only=read_only)
+            _pools[key] = pool
+        return pool
+
+
+def _ensure_migrated(db_path):
+    path = str(Path(db_path).resolve())
+    if path in _migrated_paths:
+        return
+    conn = connect_database(db_path)
+    try:
+        run_migrations(conn)
+    finally:
+        conn.close()
+    _migrated_paths.add(path)
+
+
+@contextmanager
+def use_connection(conn=None):
+    """
+    Yield the caller's connection, or borrow one from the default pool.
+
+    Args:
+        conn: Database connection, or None to use the shared pool
+    """
+    if conn is not None:
+        yield conn
+        return
+    with get_pool().connection() as pooled:
+        yield pooled
+
+
+@contextmanager
+def transaction(conn):
+    """
+    Run a block inside a single write transaction.
+
+    Commits when the block succeeds and rolls back if it raises. If the
+    connection is already inside a transaction the block simply joins it,
+    leaving the commit to whoever opened it.
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def iter_row_tuples(rows, columns):
+    """
+    Yield each row as a tuple ordered like `columns`.
+
+    Args:
+        rows: DataFrame, or iterable of tuples/lists (already in column
+            order) or dicts keyed by column name; generators are consumed lazily
+        columns: Column names in insert order
+    """
+    if hasattr(rows, "itertuples"):
+        yield from rows[list(columns)].itertuples(index=False, name=None)
+        return
+    for row in rows:
+        if isinstance(row, dict):
+            yield tuple(row.get(column) for column in columns)
+        else:
+            yield tuple(row)
+
+
+def bulk_insert(conn, table_name, columns, rows, batch_size=BULK_BATCH_SIZE,
+                defer_triggers=True):
+    """
+    Insert many rows with executemany inside one transaction.
+
+    Large loads run with the table's derived-data insert triggers (summaries,
+    trends, search, resolution times, cache versions) dropped. Before the
+    transaction commits the triggers are recreated and the new rows are
+    applied to each derived table with one set-based statement, so readers
+    never see the tables out of step. See schema.drop_insert_triggers.
+
+    Args:
+        conn: Database connection
+        table_name: Target table (must use AUTOINCREMENT ids)
+        columns: Column names in insert order
+        rows: Rows accepted by iter_row_tuples
+        batch_size: Rows sent to each executemany call
+        defer_triggers: Drop the insert triggers when the load has at least
+            BULK_DEFER_TRIGGERS_MIN_ROWS rows (or fills a whole batch)
+
+    Returns:
+        range: IDs assigned to the inserted rows (empty if none)
+    """
+    placeholders = ", ".join("?" for _ in columns)
+    sql = (f"INSERT INTO {table_name} ({', '.join(columns)}) "
+           f"VALUES ({placeholders})")
+    row_iter = iter_row_tuples(rows, columns)
+
+    with transaction(conn):
+        # The write lock is held from here on, so the new ids are contiguous
+        first_id = _last_sequence_id(conn, table_name) + 1
+        cursor = conn.cursor()
+        batch = list(islice(row_iter, batch_size))
+        triggers = []
+        if defer_triggers and len(batch) >= min(batch_size, BULK_DEFER_TRIGGERS_MIN_ROWS):
+            triggers = drop_insert_triggers(cursor, table_name)
+        while batch:
+            cursor.executemany(sql, batch)
+            batch = list(islice(row_iter, batch_size))
+        last_id = _last_sequence_id(conn, table_name)
+        if triggers:
+            restore_insert_triggers(cursor, table_name, triggers, first_id, last_id)
+
+    return range(first_id, last_id + 1)
+
+
+def _last_sequence_id(conn, table_name):
+    row = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = ?", (table_name,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def load_csv_to_table(conn, csv_path, table_name, chunksize=None, track_memory=False):
     """
     Load a CSV file into a database table using pandas.
 
@@ -20,6 +381,9 @@ def load_csv_to_table(conn, csv_path, table_name):
         conn: Database connection
         csv_path: Path to CSV file
         table_name: Name of the target table
+        chunksize: Stream the file this many rows at a time instead of
+            reading it whole; all chunks are written in one transaction
+        track_memory: Report peak Python memory while streaming (tracemalloc)
 
     Returns:
         int: Number of rows loaded
@@ -30,7 +394,10 @@ def load_csv_to_table(conn, csv_path, table_name):
         print(f"CSV file not found: {csv_path}")
         return 0
 
-    df = pd.read_csv(csv_path)
+    if chunksize:
+        return _stream_csv_to_table(conn, csv_path, table_name, chunksize, track_memory)
+
+    df = normalise_dates(pd.read_csv(csv_path), table_name)
     row_count = len(df)
 
     df.to_sql(name=table_name, con=conn, if_exists='append', index=False)
@@ -40,26 +407,243 @@ def load_csv_to_table(conn, csv_path, table_name):
     return row_count
 
 
-def load_all_csv_data(conn):
+def _stream_csv_to_table(conn, csv_path, table_name, chunksize, track_memory):
+    """Append a CSV chunk by chunk so memory stays flat whatever its size."""
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if track_memory:
+        tracemalloc.reset_peak()
+
+    try:
+        with open(csv_path, "rb") as f, transaction(conn):
+            row_count = _copy_csv_rows(conn, f, csv_path, table_name, chunksize)
+        if track_memory:
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            print(f"  Peak memory while streaming: {peak_mb:.1f} MB")
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    print(
+        f"Loaded {row_count} rows from {csv_path.name} into {table_name}")
+    return row_count
+
+
+def _copy_csv_rows(conn, f, csv_path, table_name, chunksize=None, names=None):
+    """
+    Append CSV rows from an open binary handle, starting at its position.
+
+    The caller owns the transaction. With chunksize the file is read that
+    many rows at a time; `names` supplies the header when `f` has been
+    positioned past it.
+    """
+    remaining_bytes = csv_path.stat().st_size - f.tell()
+    header = "infer" if names is None else None
+    if chunksize:
+        chunks = pd.read_csv(f, chunksize=chunksize, header=header, names=names)
+    else:
+        chunks = [pd.read_csv(f, header=header, names=names)]
+
+    row_count = 0
+    estimated_rows = None
+    for chunk in chunks:
+        if chunksize and estimated_rows is None and len(chunk):
+            # pandas reads far ahead of the rows it returns, so the file
+            # position says nothing about progress; estimate the row count
+            # from the first chunk's average row length instead
+            row_bytes = len(chunk.to_csv(index=False, header=False).encode()) / len(chunk)
+            estimated_rows = max(remaining_bytes / row_bytes, 1)
+        chunk = normalise_dates(chunk, table_name)
+        bulk_insert(conn, table_name, list(chunk.columns), chunk)
+        row_count += len(chunk)
+        if chunksize:
+            print(f"  {table_name}: {row_count:,} rows "
+                  f"(~{min(row_count / estimated_rows, 1):.0%} of {csv_path.name})")
+    return row_count
+
+
+def normalise_dates(df, table_name):
+    """
+    Convert a table's DD/MM/YYYY [HH:MM] CSV columns to ISO-8601 text.
+
+    Parsing is vectorised per column; values that do not match the CSV
+    format (blank, or already ISO) are left unchanged.
+
+    Args:
+        df: DataFrame read from a CSV
+        table_name: Target table, used to look up its date columns
+
+    Returns:
+        pandas.DataFrame: The same frame with date columns rewritten
+    """
+    for column in DATE_COLUMNS.get(table_name, []):
+        if column not in df.columns:
+            continue
+        source_format, iso_format = (
+            CSV_TIMESTAMP_FORMAT if column == "created_at" else CSV_DATE_FORMAT)
+        parsed = pd.to_datetime(df[column], format=source_format, errors="coerce")
+        df[column] = parsed.dt.strftime(iso_format).where(parsed.notna(), df[column])
+    return df
+
+
+def load_csv_incremental(conn, csv_path, table_name, chunksize=None):
+    """
+    Load only what is new in a CSV since the last run, using the manifest.
+
+    Unchanged files (same size and mtime) are skipped without being read.
+    Files that grew are verified against the stored hash of the part
+    already loaded, and only the new tail is appended. Files rewritten in
+    place are reported and left alone so rows are never duplicated. Files
+    without a manifest entry are loaded whole, whatever the table holds;
+    loads made before the manifest existed are recorded once by a schema
+    migration (see adopt_csv_file).
+
+    Args:
+        conn: Database connection
+        csv_path: Path to CSV file
+        table_name: Name of the target table
+        chunksize: Stream in chunks of this many rows (None reads whole)
+
+    Returns:
+        int: Number of rows loaded
+    """
+    csv_path = Path(csv_path)
+
+    if not csv_path.exists():
+        print(f"CSV file not found: {csv_path}")
+        return 0
+
+    source = csv_path.as_posix()
+    stat = csv_path.stat()
+    entry = conn.execute(
+        "SELECT size_bytes, mtime_ns, content_hash, byte_offset, row_count "
+        "FROM ingestion_manifest WHERE source_path = ?", (source,)
+    ).fetchone()
+
+    if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        print(f"Skipped {csv_path.name}: unchanged since last load")
+        return 0
+
+    with open(csv_path, "rb") as f, transaction(conn):
+        if entry is None:
+            row_count = _copy_csv_rows(conn, f, csv_path, table_name, chunksize)
+            total_rows = row_count
+        else:
+            _, _, old_hash, old_offset, total_rows = entry
+            if not _is_appended(f, stat.st_size, old_hash, old_offset):
+                print(f"⚠️  {csv_path.name} was modified in place; not reloaded "
+                      f"to avoid duplicate rows")
+                return 0
+            names = list(pd.read_csv(csv_path, nrows=0).columns)
+            f.seek(old_offset)
+            row_count = 0
+            if stat.st_size > old_offset:
+                row_count = _copy_csv_rows(conn, f, csv_path, table_name,
+                                           chunksize, names=names)
+            total_rows += row_count
+
+        conn.execute("""
+            INSERT OR REPLACE INTO ingestion_manifest
+            (source_path, table_name, size_bytes, mtime_ns, content_hash,
+             byte_offset, row_count, loaded_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (source, table_name, stat.st_size, stat.st_mtime_ns,
+              _hash_prefix(f, stat.st_size), stat.st_size, total_rows))
+
+    print(
+        f"Loaded {row_count} rows from {csv_path.name} into {table_name}")
+    return row_count
+
+
+def adopt_csv_file(conn, csv_path, table_name):
+    """
+    Record a CSV in the manifest as fully loaded, without loading it.
+
+    For tables filled from the file before the manifest existed: it is
+    adopted only when it has no manifest entry yet and the table holds at
+    least as many rows as the file, so a table with a few rows from
+    elsewhere never swallows a file that was not loaded. The caller owns
+    the transaction.
+
+    Returns:
+        bool: Whether the file was recorded
+    """
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        return False
+    source = csv_path.as_posix()
+    if conn.execute("SELECT 1 FROM ingestion_manifest WHERE source_path = ?",
+                    (source,)).fetchone():
+        return False
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        file_rows = max(sum(1 for _ in csv.reader(f)) - 1, 0)
+    table_rows = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    if not file_rows or table_rows < file_rows:
+        return False
+
+    stat = csv_path.stat()
+    with open(csv_path, "rb") as f:
+        content_hash = _hash_prefix(f, stat.st_size)
+    conn.execute("""
+        INSERT INTO ingestion_manifest
+        (source_path, table_name, size_bytes, mtime_ns, content_hash,
+         byte_offset, row_count, loaded_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    """, (source, table_name, stat.st_size, stat.st_mtime_ns, content_hash,
+          stat.st_size, file_rows))
+    print(f"Recorded {csv_path.name} as already loaded into {table_name}")
+    return True
+
+
+def _is_appended(f, size, old_hash, old_offset):
+    """True if the file still starts with exactly the bytes loaded last time."""
+    if size < old_offset or _hash_prefix(f, old_offset) != old_hash:
+        return False
+    if old_offset == 0 or size == old_offset:
+        return True
+    # A last line without a newline must not have been extended
+    f.seek(old_offset - 1)
+    boundary = f.read(2)
+    return boundary[:1] in (b"\n", b"\r") or boundary[1:] in (b"\n", b"\r")
+
+
+def _hash_prefix(f, length, block_size=1024 * 1024):
+    """SHA-256 of the first `length` bytes of an open binary file."""
+    digest = hashlib.sha256()
+    f.seek(0)
+    remaining = length
+    while remaining > 0:
+        block = f.read(min(block_size, remaining))
+        if not block:
+            break
+        digest.update(block)
+        remaining -= len(block)
+    return digest.hexdigest()
+
+
+def load_all_csv_data(conn, streaming_threshold=STREAMING_THRESHOLD_BYTES):
     """
     Load all CSV files into their respective tables.
 
+    Files already recorded in the ingestion manifest are skipped, or only
+    their new rows appended, so running this again does not duplicate data.
+
     Args:
         conn: Database connection
+        streaming_threshold: Files larger than this many bytes are streamed
+            in CSV_CHUNK_ROWS chunks rather than read whole
 
     Returns:
         int: Total number of rows loaded
     """
     total_rows = 0
 
-    csv_files = [
-        (DATA_DIR / "cyber_incidents.csv", "cyber_incidents"),
-        (DATA_DIR / "datasets_metadata.csv", "datasets_metadata"),
-        (DATA_DIR / "it_tickets.csv", "it_tickets")
-    ]
-
-    for csv_path, table_name in csv_files:
-        rows_loaded = load_csv_to_table(conn, csv_path, table_name)
+    for csv_path, table_name in CSV_SOURCES:
+        large = csv_path.exists() and csv_path.stat().st_size > streaming_threshold
+        chunksize = CSV_CHUNK_ROWS if large else None
+        rows_loaded = load_csv_incremental(conn, csv_path, table_name, chunksize=chunksize)
         total_rows += rows_loaded
 
     print(f"\nTotal rows loaded: {total_rows}")
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from app.data.cache import cached_call
+from app.data.schema import DATE_COLUMNS, DAY_COLUMNS
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = {
+    "cyber_incidents": ["severity", "status", "incident_type"],
+    "it_tickets": ["priority", "status", "category", "assigned_to"],
+    "datasets_metadata": ["category", "source"],
+}
+
+
+def compact_frame(df, table_name, arrow=False):
+    """
+    Shrink a frame read from one of the domain tables.
+
+    - CATEGORICAL_COLUMNS become categoricals
+    - Integer columns are downcast to the smallest type that fits; floats
+      only when float32 holds every value exactly
+    - DAY_COLUMNS dates become datetime64 (from their epoch-day companion,
+      which is then dropped) and created_at is parsed as a timestamp
+    - With `arrow`, remaining text and numbers use the pyarrow dtype
+      backend (needs the optional pyarrow package)
+
+    The result's attrs["memory_report"] compares its deep memory use with
+    the input's (see memory_report).
+
+    Args:
+        df: DataFrame as returned by SELECT * on `table_name`
+        table_name: Table the frame was read from
+        arrow: Use pyarrow-backed dtypes for the non-categorical columns
+
+    Returns:
+        pandas.DataFrame: A compacted copy; `df` is not modified
+    """
+    compact = df.copy()
+
+    for column in DAY_COLUMNS.get(table_name, []):
+        day_column = f"{column}_day"
+        if day_column in compact.columns:
+            compact[column] = pd.to_datetime(compact.pop(day_column), unit="D")
+    for column in DATE_COLUMNS.get(table_name, []):
+        if column in compact.columns and pd.api.types.is_string_dtype(compact[column]):
+            compact[column] = pd.to_datetime(compact[column], format="ISO8601", errors="coerce")
+
+    for column in compact.select_dtypes(include="number").columns:
+        values = compact[column]
+        if pd.api.types.is_integer_dtype(values):
+            compact[column] = pd.to_numeric(values, downcast="integer")
+        else:
+            downcast = values.astype(np.float32)
+            if downcast.astype(values.dtype).equals(values):
+                compact[column] = downcast
+
+    if arrow:
+        try:
+            import pyarrow  # noqa: F401 - optional dependency
+        except ImportError as exc:
+            raise ImportError("arrow=True needs the pyarrow package (pip install pyarrow)") from exc
+        # Categoricals are kept; everything else moves to Arrow arrays
+        categorical = [c for c in CATEGORICAL_COLUMNS.get(table_name, []) if c in compact]
+        others = compact.columns.difference(categorical, sort=False)
+        compact[others] = compact[others].convert_dtypes(dtype_backend="pyarrow")
+
+    for column in CATEGORICAL_COLUMNS.get(table_name, []):
+        if column in compact.columns:
+            compact[column] = compact[column].astype("category")
+
+    compact.attrs["memory_report"] = memory_report(df, compact)
+    return compact
+
+
+def memory_report(original, compact):
+    """
+    Compare the deep memory use of two frames.
+
+    Returns:
+        dict: original_bytes, compact_bytes, saved_bytes and ratio
+            (original / compact)
+    """
+    original_bytes = int(original.memory_usage(index=True, deep=True).sum())
+    compact_bytes = int(compact.memory_usage(index=True, deep=True).sum())
+    return {
+        "original_bytes": original_bytes,
+        "compact_bytes": compact_bytes,
+        "saved_bytes": original_bytes - compact_bytes,
+        "ratio": original_bytes / compact_bytes if compact_bytes else 1.0,
+    }
+
+
+def read_table_compact(query, conn, table_name, arrow=False):
+    """
+    Read a query over `table_name` and return it compacted, memoised in the
+    shared query cache until the table changes.
+
+    Only the compact frame is cached, so opting in also shrinks the cache.
+
+    Returns:
+        pandas.DataFrame: See compact_frame (shared; treat as read-only)
+    """
+    return cached_call(
+        conn, ("compact", query, arrow), (table_name,),
+        lambda: compact_frame(pd.read_sql_query(query, conn), table_name, arrow))
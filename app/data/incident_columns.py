@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from app.data.cache import table_versions
+from app.data.pagination import epoch_day
+from models.security_incident import SEVERITY_LEVELS
+
+# Memory-mapped copies of the column store, one directory per table version
+INCIDENT_COLUMNS_CACHE = Path("DATA") / "cache" / "incident_columns"
+
+# Dictionary-encoded cyber_incidents columns
+CATEGORICAL_COLUMNS = ("severity", "status", "incident_type")
+
+# Code of a NULL categorical value, and date_days of an incident without a date
+MISSING_CODE = -1
+MISSING_DAY = np.iinfo(np.int32).min
+
+# Rows fetched per round trip while loading
+LOAD_BATCH_SIZE = 50000
+
+
+class IncidentColumns:
+    """
+    cyber_incidents held column by column in typed NumPy arrays.
+
+    ids are int64, date_days int32 epoch days (MISSING_DAY when unknown),
+    and every CATEGORICAL_COLUMNS column is an int16 code array indexing
+    `categories[column]` (MISSING_CODE for NULL). Filters, group counts and
+    severity scoring run as whole-array operations, so millions of incidents
+    are triaged without building a Python object per row.
+
+    Arrays loaded from the on-disk cache are read-only memory maps; filter()
+    returns an in-memory copy.
+    """
+
+    def __init__(self, ids, date_days, codes, categories):
+        """
+        Args:
+            ids: int64 array of incident ids
+            date_days: int32 array of epoch days
+            codes: Dict of column -> code array, one per CATEGORICAL_COLUMNS
+            categories: Dict of column -> list of values the codes index
+        """
+        self.ids = ids
+        self.date_days = date_days
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_database(cls, conn, batch_size=LOAD_BATCH_SIZE):
+        """Read cyber_incidents into a new column store, in id order."""
+        lookups = {column: {} for column in CATEGORICAL_COLUMNS}
+        ids, days = [], []
+        codes = {column: [] for column in CATEGORICAL_COLUMNS}
+
+        cursor = conn.execute(f"""
+            SELECT id, IFNULL(date_day, {MISSING_DAY}), {', '.join(CATEGORICAL_COLUMNS)}
+            FROM cyber_incidents
+            ORDER BY id
+        """)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            ids.append(np.array(columns[0], dtype=np.int64))
+            days.append(np.array(columns[1], dtype=np.int32))
+            for column, values in zip(CATEGORICAL_COLUMNS, columns[2:]):
+                lookup = lookups[column]
+                codes[column].append(np.fromiter(
+                    (MISSING_CODE if value is None else lookup.setdefault(value, len(lookup))
+                     for value in values), dtype=np.int16, count=len(values)))
+
+        def concat(chunks, dtype):
+            return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+        return cls(concat(ids, np.int64), concat(days, np.int32),
+                   {column: concat(chunks, np.int16) for column, chunks in codes.items()},
+                   {column: list(lookup) for column, lookup in lookups.items()})
+
+    # ---------- Vectorised queries ----------
+
+    def mask(self, filters=None):
+        """
+        Boolean array selecting the incidents that match `filters`.
+
+        Args:
+            filters: Dict of CATEGORICAL_COLUMNS column -> value (or list of
+                values), plus "start"/"end" dates bounding the incident date
+                (date or ISO string), as for get_incidents_page
+
+        Returns:
+            numpy.ndarray: bool, one entry per incident
+        """
+        filters = dict(filters or {})
+        selected = np.ones(len(self), dtype=bool)
+        start, end = filters.pop("start", None), filters.pop("end", None)
+        if start is not None:
+            selected &= self.date_days >= epoch_day(start)
+        if end is not None:
+            selected &= (self.date_days <= epoch_day(end)) & (self.date_days != MISSING_DAY)
+
+        for column, value in filters.items():
+            if column not in self.codes:
+                raise ValueError(f"Cannot filter on {column}")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            index = {category: code for code, category in enumerate(self.categories[column])}
+            wanted = [index[v] for v in values if v in index]
+            selected &= np.isin(self.codes[column], wanted)
+        return selected
+
+    def filter(self, filters=None):
+        """Return a new IncidentColumns holding only the incidents matching `filters`."""
+        selected = self.mask(filters)
+        return IncidentColumns(self.ids[selected], self.date_days[selected],
+                               {column: codes[selected] for column, codes in self.codes.items()},
+                               self.categories)
+
+    def group_counts(self, column, mask=None):
+        """
+        Count incidents per value of a categorical column.
+
+        Args:
+            column: One of CATEGORICAL_COLUMNS
+            mask: Optional boolean array (see mask()) restricting the count
+
+        Returns:
+            pandas.DataFrame: `column` and count, largest count first; NULLs
+                are counted under None
+        """
+        if column not in self.codes:
+            raise ValueError(f"Cannot count by {column}")
+        codes = self.codes[column] if mask is None else self.codes[column][mask]
+        # Shift by one so MISSING_CODE lands in bin 0
+        counts = np.bincount(codes.astype(np.intp) + 1,
+                             minlength=len(self.categories[column]) + 1)
+        result = pd.DataFrame({column: [None] + self.categories[column], "count": counts})
+        return (result[result["count"] > 0]
+                .sort_values("count", ascending=False, ignore_index=True))
+
+    def severity_levels(self):
+        """
+        Severity of every incident as an int8 level (see SEVERITY_LEVELS).
+
+        Each distinct severity string is mapped once; the per-incident
+        result is a single table lookup.
+        """
+        levels = np.array([SEVERITY_LEVELS.get(value.lower(), 0)
+                           for value in self.categories["severity"]] + [0], dtype=np.int8)
+        # MISSING_CODE (-1) indexes the trailing 0
+        return levels[self.codes["severity"]]
+
+    def decode(self, column):
+        """Return the values of a categorical column as an object array."""
+        lookup = np.array(self.categories[column] + [None], dtype=object)
+        return lookup[self.codes[column]]
+
+    # ---------- On-disk cache ----------
+
+    def save(self, directory):
+        """Write the arrays as .npy files and the dictionaries as JSON."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "ids.npy", self.ids)
+        np.save(directory / "date_days.npy", self.date_days)
+        for column, codes in self.codes.items():
+            np.save(directory / f"{column}.npy", codes)
+        with open(directory / "categories.json", "w") as f:
+            json.dump(self.categories, f)
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map a store written by save(); only pages read are loaded."""
+        directory = Path(directory)
+        with open(directory / "categories.json") as f:
+            categories = json.load(f)
+        return cls(np.load(directory / "ids.npy", mmap_mode="r"),
+                   np.load(directory / "date_days.npy", mmap_mode="r"),
+                   {column: np.load(directory / f"{column}.npy", mmap_mode="r")
+                    for column in CATEGORICAL_COLUMNS},
+                   categories)
+
+
+def load_incident_columns(conn, cache_dir=INCIDENT_COLUMNS_CACHE):
+    """
+    Return the incident column store, memory-mapped from the cache when current.
+
+    Cached copies are named after the database file, its identity and the
+    cyber_incidents version from table_versions, so any committed write to
+    the table - from this process or another - or rebuilding the database
+    at the same path triggers a reload from SQLite on next use. A
+    new copy is written to a temporary directory and renamed into place, so
+    concurrent readers never see a partial cache.
+
+    Args:
+        conn: Database connection
+        cache_dir: Directory holding cached stores (None to skip caching;
+            also skipped for databases without an identity in table_versions)
+
+    Returns:
+        IncidentColumns
+    """
+    if cache_dir is None:
+        return IncidentColumns.from_database(conn)
+
+    db_file, database_id, versions = table_versions(conn, ["cyber_incidents"])
+    version = versions[0][1] if versions else 0
+    if database_id is None:
+        # Without an identity (schema older than migration 11) a database
+        # rebuilt at the same path is indistinguishable, so skip the cache
+        return IncidentColumns.from_database(conn)
+    db_tag = hashlib.blake2b(str(db_file).encode(), digest_size=4).hexdigest()
+    cache_dir = Path(cache_dir)
+    target = cache_dir / f"{db_tag}-{database_id}-v{version}"
+    if target.is_dir():
+        return IncidentColumns.load(target)
+
+    columns = IncidentColumns.from_database(conn)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-"))
+    columns.save(staging)
+    try:
+        os.rename(staging, target)
+    except OSError:
+        # Another process cached this version first
+        shutil.rmtree(staging, ignore_errors=True)
+
+    # Drop older versions and copies of a previous database at this path;
+    # open memory maps keep their files alive until they are released
+    for entry in cache_dir.glob(f"{db_tag}-*"):
+        identity, entry_version = entry.name[len(db_tag) + 1:].rsplit("-v", 1)
+        if identity != str(database_id) or int(entry_version) < version:
+            shutil.rmtree(entry, ignore_errors=True)
+    return IncidentColumns.load(target)
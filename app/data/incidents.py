@@ -1,5 +1,24 @@
-import pandas as pd
-from app.data.db import connect_database
+from app.data.cache import cached_call, read_sql_cached
+from app.data.db import BULK_BATCH_SIZE, bulk_insert, use_connection
+from app.data.frames import read_table_compact
+from app.data.incident_columns import load_incident_columns
+from app.data.pagination import ITER_BATCH_SIZE, PAGE_SIZE, fetch_page, iter_models
+from app.data.search import search_table
+from app.data.summaries import (read_summary_count, read_summary_counts, read_summary_totals,
+                                read_summary_values)
+from app.data.trends import read_trend
+from models.security_incident import SecurityIncident
+
+# Insert order used by the bulk API
+INCIDENT_COLUMNS = ("date", "incident_type", "severity", "status", "description", "reported_by")
+
+# Columns the raw-data explorer may filter on
+INCIDENT_FILTERS = ("severity", "status", "incident_type", "reported_by")
+
+# Columns returned with each search hit
+INCIDENT_SEARCH_COLUMNS = ("id", "date", "incident_type", "severity", "status")
+
+SEARCH_LIMIT = 20
 
 
 def insert_incident(conn, date, incident_type, severity, status, description, reported_by=None):
@@ -7,7 +26,7 @@ def insert_incident(conn, date, incident_type, severity, status, description, re
     Insert a new cyber incident into the database.
 
     Args:
-        conn: Database connection
+        conn: Database connection (None to use the shared pool)
         date: Incident date (YYYY-MM-DD)
         incident_type: Type of incident
         severity: Severity level
@@ -18,117 +37,231 @@ def insert_incident(conn, date, incident_type, severity, status, description, re
     Returns:
         int: ID of the inserted incident
     """
-    conn = connect_database()
-    cursor = conn.cursor()
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
 
-    cursor.execute("""
-        INSERT INTO cyber_incidents 
-        (date, incident_type, severity, status, description, reported_by)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (date, incident_type, severity, status, description, reported_by))
+        cursor.execute("""
+            INSERT INTO cyber_incidents 
+            (date, incident_type, severity, status, description, reported_by)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (date, incident_type, severity, status, description, reported_by))
 
-    conn.commit()
-    incident_id = cursor.lastrowid
-    conn.close()
+        conn.commit()
+        return cursor.lastrowid
 
-    return incident_id
 
+def insert_incidents_bulk(conn, incidents, batch_size=BULK_BATCH_SIZE):
+    """
+    Insert many incidents in a single transaction.
 
-def get_all_incidents(conn):
+    Args:
+        conn: Database connection (None to use the shared pool)
+        incidents: DataFrame, or iterable of tuples in INCIDENT_COLUMNS order
+            (or dicts keyed by column name); generators are streamed
+        batch_size: Rows sent to each executemany call
+
+    Returns:
+        range: IDs of the inserted incidents
+    """
+    with use_connection(conn) as conn:
+        return bulk_insert(conn, "cyber_incidents", INCIDENT_COLUMNS, incidents, batch_size)
+
+
+def get_all_incidents(conn, compact=False, arrow=False):
     """
     Retrieve all incidents from the database.
 
+    Args:
+        conn: Database connection (None to use the shared pool)
+        compact: Return a memory-lean frame (categoricals, downcast numbers,
+            datetime dates); see app.data.frames.compact_frame
+        arrow: With compact, also use pyarrow-backed dtypes
+
     Returns:
-        pandas.DataFrame: All incidents
+        pandas.DataFrame: All incidents (a private copy that is safe
+            to modify)
     """
-    conn = connect_database()
+    query = "SELECT * FROM cyber_incidents"
+    with use_connection(conn) as conn:
+        if compact:
+            return read_table_compact(query, conn, "cyber_incidents", arrow).copy()
+        return read_sql_cached(query, conn, ("cyber_incidents",)).copy()
 
-    df = pd.read_sql_query("SELECT * FROM cyber_incidents", conn)
 
-    conn.close()
-    return df
+def get_incidents_page(conn, filters=None, sort_by="id", descending=True, cursor=None,
+                       page_size=PAGE_SIZE):
+    """
+    Fetch one page of incidents for the raw-data explorer.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        filters: Dict with any of severity, status, incident_type, reported_by (a value
+            or list of values), plus "start"/"end" dates bounding date
+        sort_by: "id" or "date"
+        descending: Newest first when True
+        cursor: next_cursor of the previous page, or None for the first page
+        page_size: Rows per page
+
+    Returns:
+        Page: rows, next_cursor, total and total_is_exact
+    """
+    with use_connection(conn) as conn:
+        return fetch_page(conn, "cyber_incidents", filters, INCIDENT_FILTERS, "date",
+                          sort_by, descending, cursor, page_size)
+
+
+def iter_incidents(conn, filters=None, batch_size=ITER_BATCH_SIZE):
+    """
+    Stream incidents as SecurityIncident objects in id order, without pandas.
+
+    A pooled connection is held until the generator is exhausted or closed.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        filters: Same as get_incidents_page
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        SecurityIncident
+    """
+    with use_connection(conn) as conn:
+        yield from iter_models(conn, "cyber_incidents", SecurityIncident, filters,
+                               INCIDENT_FILTERS, "date", batch_size)
+
+
+def get_incident_columns(conn):
+    """
+    Load every incident into a NumPy column store for vectorised triage.
+
+    Reuses the memory-mapped cache under DATA/cache until cyber_incidents
+    changes.
+
+    Returns:
+        IncidentColumns: See app.data.incident_columns
+    """
+    with use_connection(conn) as conn:
+        return load_incident_columns(conn)
+
+
+def search_incidents(conn, query, limit=SEARCH_LIMIT):
+    """
+    Full-text search over incident descriptions, best matches first.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        query: Words to look for; all must match, the last also as a prefix
+        limit: Maximum number of results
+
+    Returns:
+        pandas.DataFrame: INCIDENT_SEARCH_COLUMNS plus a highlighted
+            snippet and BM25 rank
+    """
+    with use_connection(conn) as conn:
+        return search_table(conn, "cyber_incidents", INCIDENT_SEARCH_COLUMNS, query, limit)
 
 
 def get_incidents_by_type_count(conn):
     """
     Count incidents by type.
-    Uses: SELECT, FROM, GROUP BY, ORDER BY
-    """
-    query = """
-    SELECT incident_type, COUNT(*) as count
-    FROM cyber_incidents
-    GROUP BY incident_type
-    ORDER BY count DESC
+    Reads the trigger-maintained summary_counts table.
     """
-    df = pd.read_sql_query(query, conn)
-    return df
+    with use_connection(conn) as conn:
+        return read_summary_counts(conn, "cyber_incidents", "incident_type", "incident_type")
 
 
 def get_high_severity_by_status(conn):
     """
     Count high severity incidents by status.
-    Uses: SELECT, FROM, WHERE, GROUP BY, ORDER BY
+    Reads the trigger-maintained summary_counts table.
     """
-    query = """
-    SELECT status, COUNT(*) as count
-    FROM cyber_incidents
-    WHERE severity = 'High'
-    GROUP BY status
-    ORDER BY count DESC
-    """
-    df = pd.read_sql_query(query, conn)
-    return df
+    with use_connection(conn) as conn:
+        return read_summary_counts(conn, "cyber_incidents", "severity,status", "status",
+                                   value="High")
 
 
 def get_incident_types_with_many_cases(conn, min_count=15):
     """
     Find incident types with more than min_count cases.
-    Uses: SELECT, FROM, GROUP BY, HAVING, ORDER BY
+    Reads the trigger-maintained summary_counts table.
+    """
+    with use_connection(conn) as conn:
+        return read_summary_counts(conn, "cyber_incidents", "incident_type", "incident_type",
+                                   min_count=min_count)
+
+
+def get_incident_filter_options(conn):
+    """
+    Values offered by the incident explorer's filters.
+    Reads the trigger-maintained summary_counts table.
+
+    Returns:
+        dict: column -> sorted list of values present in cyber_incidents
+    """
+    with use_connection(conn) as conn:
+        return read_summary_values(conn, "cyber_incidents", ("severity", "status", "incident_type"))
+
+
+def get_incident_kpis(conn):
+    """
+    Headline incident counts for the dashboard, read from the summary tables.
+
+    Returns:
+        dict: total, open and critical incident counts
+    """
+    with use_connection(conn) as conn:
+        return cached_call(conn, ("get_incident_kpis",), ("cyber_incidents",), lambda: {
+            "total": read_summary_totals(conn, "cyber_incidents")[0],
+            "open": read_summary_count(conn, "cyber_incidents", "status", "Open"),
+            "critical": read_summary_count(conn, "cyber_incidents", "severity", "Critical"),
+        })
+
+
+def get_incident_trend(conn, granularity="week", start=None, end=None, by=None):
     """
-    query = """
-    SELECT incident_type, COUNT(*) as count
-    FROM cyber_incidents
-    GROUP BY incident_type
-    HAVING COUNT(*) > ?
-    ORDER BY count DESC
+    Incident counts over time, read from the trend rollups.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        granularity: "day", "week" or "month"
+        start: First date to include (date or ISO string); None for all history
+        end: Last date to include; None for no upper bound
+        by: None for overall counts, or "severity" or "incident_type"
+
+    Returns:
+        pandas.DataFrame: bucket (first day of each period), the `by` column
+            when given, and reported (incidents dated in each bucket)
     """
-    df = pd.read_sql_query(query, conn, params=(min_count,))
-    return df
+    with use_connection(conn) as conn:
+        return read_trend(conn, "cyber_incidents", granularity, start, end, by)
 
 
 def update_incident_status(conn, incident_id, new_status):
     """
     Update the status of an incident.
     """
-    conn = connect_database()
-    cursor = conn.cursor()
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
 
-    cursor.execute(
-        "UPDATE cyber_incidents SET status = ? WHERE id = ?",
-        (new_status, incident_id)
-    )
+        cursor.execute(
+            "UPDATE cyber_incidents SET status = ? WHERE id = ?",
+            (new_status, incident_id)
+        )
 
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-
-    return rows_affected
+        conn.commit()
+        return cursor.rowcount
 
 
 def delete_incident(conn, incident_id):
     """
     Delete an incident from the database.
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "DELETE FROM cyber_incidents WHERE id = ?",
-        (incident_id,)
-    )
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
 
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
+        cursor.execute(
+            "DELETE FROM cyber_incidents WHERE id = ?",
+            (incident_id,)
+        )
 
-    return rows_affected
+        conn.commit()
+        return cursor.rowcount
@@ -0,0 +1,190 @@
+from collections import namedtuple
+from datetime import date, datetime
+from app.data.cache import read_sql_cached
+from app.data.summaries import SUMMARY_DIMENSIONS, read_summary_count, read_summary_totals
+
+# Rows per page and the point at which match counting stops
+PAGE_SIZE = 50
+APPROX_COUNT_CAP = 10000
+
+# Rows fetched per round trip when streaming model objects
+ITER_BATCH_SIZE = 1000
+
+# rows: DataFrame of the page; next_cursor: pass back for the following page
+# (None on the last page); total: matching rows, exact or capped at
+# APPROX_COUNT_CAP when total_is_exact is False
+Page = namedtuple("Page", ["rows", "next_cursor", "total", "total_is_exact"])
+
+
+def fetch_page(conn, table, filters=None, filter_columns=(), date_column=None,
+               sort_by="id", descending=True, cursor=None, page_size=PAGE_SIZE):
+    """
+    Fetch one page of a table using keyset (seek) pagination.
+
+    Filters and sort order are applied in SQL, and each page seeks past the
+    last row of the previous one instead of using OFFSET, so every page costs
+    one indexed lookup however deep the user has paged.
+
+    Args:
+        conn: Database connection
+        table: Table to read
+        filters: Dict of column -> value (or list of values); "start" and
+            "end" bound `date_column` (date, datetime or ISO string)
+        filter_columns: Columns callers may filter on
+        date_column: Text date column with an epoch-day companion
+        sort_by: "id" or `date_column`
+        descending: Newest first when True
+        cursor: next_cursor from the previous page, or None for the first
+        page_size: Rows per page
+
+    Returns:
+        Page: Rows, cursor for the next page and an approximate total
+    """
+    filters = dict(filters or {})
+    # An index yields each single value's rows in id order; for value lists
+    # and date ranges the matches must be sorted, and "+id" keeps SQLite
+    # from scanning the whole table in id order instead of seeking the index
+    unordered = ("start" in filters or "end" in filters
+                 or any(isinstance(value, (list, tuple, set)) for value in filters.values()))
+    conditions, params = _filter_conditions(filters, filter_columns, date_column)
+
+    dated_column = None
+    order_keys = None
+    if sort_by == "id":
+        sort_keys = ["id"]
+        if unordered:
+            order_keys = ["+id"]
+    elif date_column and sort_by == date_column:
+        dated_column = f"{date_column}_day"
+        sort_keys = [dated_column, "id"]
+        conditions.append(f"{dated_column} IS NOT NULL")
+    else:
+        raise ValueError(f"Cannot sort {table} by {sort_by}")
+
+    match_conditions, match_params = list(conditions), list(params)
+    if cursor is not None:
+        op = "<" if descending else ">"
+        conditions.append(f"({', '.join(sort_keys)}) {op} ({', '.join('?' for _ in sort_keys)})")
+        params.extend(cursor)
+
+    direction = "DESC" if descending else "ASC"
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+    SELECT * FROM {table}
+    {where}
+    ORDER BY {', '.join(f'{key} {direction}' for key in order_keys or sort_keys)}
+    LIMIT ?
+    """
+    rows = read_sql_cached(query, conn, (table,), params + [page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows.iloc[:page_size]
+        last = rows.iloc[-1]
+        next_cursor = tuple(last[key].item() if hasattr(last[key], "item") else last[key]
+                            for key in sort_keys)
+
+    total, exact = _count_matches(conn, table, filters, match_conditions, match_params,
+                                  dated_column)
+    return Page(rows, next_cursor, total, exact)
+
+
+def iter_models(conn, table, model, filters=None, filter_columns=(), date_column=None,
+                batch_size=ITER_BATCH_SIZE):
+    """
+    Stream the rows of a table matching the same filters as fetch_page, as
+    model objects, in id order.
+
+    The cursor builds each object straight from the row with
+    `model.row_factory`, so no DataFrame or intermediate tuple list is made,
+    and rows are fetched `batch_size` at a time.
+
+    Args:
+        conn: Database connection
+        table: Table to read
+        model: Class with COLUMNS and row_factory (see models/)
+        filters: As for fetch_page
+        filter_columns: Columns callers may filter on
+        date_column: Text date column with an epoch-day companion
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        model instances
+    """
+    filters = dict(filters or {})
+    conditions, params = _filter_conditions(filters, filter_columns, date_column)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cursor = conn.cursor()
+    cursor.row_factory = model.row_factory
+    try:
+        cursor.execute(f"SELECT {', '.join(model.COLUMNS)} FROM {table} {where} ORDER BY id",
+                       params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def _filter_conditions(filters, filter_columns, date_column):
+    conditions, params = [], []
+    start, end = filters.pop("start", None), filters.pop("end", None)
+    if (start is not None or end is not None) and not date_column:
+        raise ValueError("Date filters need a date column")
+    if start is not None:
+        conditions.append(f"{date_column}_day >= ?")
+        params.append(epoch_day(start))
+    if end is not None:
+        conditions.append(f"{date_column}_day <= ?")
+        params.append(epoch_day(end))
+
+    for column, value in filters.items():
+        if column not in filter_columns:
+            raise ValueError(f"Cannot filter on {column}")
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        else:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    return conditions, params
+
+
+def _count_matches(conn, table, filters, conditions, params, dated_column=None):
+    """Exact count from the summary tables when possible, else a capped COUNT."""
+    if not conditions:
+        return read_summary_totals(conn, table)[0], True
+
+    # Sorting by a date alone only drops the undated rows, which its index finds
+    if dated_column and conditions == [f"{dated_column} IS NOT NULL"]:
+        undated = conn.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE {dated_column} IS NULL").fetchone()[0]
+        return read_summary_totals(conn, table)[0] - undated, True
+
+    summarised = {columns[0] for columns in SUMMARY_DIMENSIONS.get(table, []) if len(columns) == 1}
+    if len(filters) == 1 and len(conditions) == 1:
+        (column, value), = filters.items()
+        if column in summarised and not isinstance(value, (list, tuple, set)):
+            return read_summary_count(conn, table, column, value), True
+
+    count = conn.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM {table} WHERE {' AND '.join(conditions)} LIMIT ?
+        )
+    """, params + [APPROX_COUNT_CAP + 1]).fetchone()[0]
+    if count > APPROX_COUNT_CAP:
+        return APPROX_COUNT_CAP, False
+    return count, True
+
+
+def epoch_day(value):
+    """Days since 1970-01-01 for a date, datetime or ISO date string."""
+    if isinstance(value, datetime):
+        value = value.date()
+    elif isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return (value - date(1970, 1, 1)).days
@@ -0,0 +1,124 @@
+import re
+from app.data import datasets, incidents, tickets
+from app.data.cache import clear_query_cache
+
+# Read helpers whose plans must stay index-backed. get_all_* are left out:
+# returning every row is a full scan by definition.
+DASHBOARD_FUNCTIONS = [
+    incidents.get_incident_kpis,
+    incidents.get_incidents_by_type_count,
+    incidents.get_high_severity_by_status,
+    incidents.get_incident_types_with_many_cases,
+    incidents.get_incident_filter_options,
+    tickets.get_ticket_kpis,
+    tickets.get_tickets_by_priority,
+    tickets.get_tickets_by_status,
+    tickets.get_tickets_by_category,
+    tickets.get_ticket_filter_options,
+    tickets.get_resolution_stats,
+    datasets.get_dataset_kpis,
+    datasets.get_dataset_by_category_count,
+    datasets.get_dataset_by_source,
+    datasets.get_dataset_filter_options,
+]
+
+# Explorer, search and trend reads, with arguments covering each filter,
+# sort order and breakdown the pages offer
+DASHBOARD_CALLS = [
+    (incidents.get_incidents_page, ()),
+    (incidents.get_incidents_page, ({"severity": ["High", "Critical"]},)),
+    (incidents.get_incidents_page, ({"status": "Open", "incident_type": "Phishing"},)),
+    (incidents.get_incidents_page, ({"start": "2024-01-01", "end": "2024-12-31"}, "date")),
+    (incidents.get_incidents_page, ({}, "date")),
+    (incidents.search_incidents, ("phishing email",)),
+    (incidents.get_incident_trend, ("week",)),
+    (incidents.get_incident_trend, ("month", "2024-01-01", "2024-12-31", "severity")),
+    (tickets.get_tickets_page, ()),
+    (tickets.get_tickets_page, ({"priority": "High", "status": ["Open", "In Progress"]},)),
+    (tickets.get_tickets_page, ({"category": "Network"}, "created_date")),
+    (tickets.get_tickets_page, ({"assigned_to": "IT_Support_A"},)),
+    (tickets.search_tickets, ("password reset",)),
+    (tickets.get_ticket_trend, ("day", None, None, "category")),
+    (datasets.get_datasets_page, ({"category": "Cloud Logs", "source": "Internal"},)),
+    (datasets.get_datasets_page, ({"start": "2024-01-01"}, "last_updated")),
+]
+
+# Queries issued directly by the dashboard pages
+DASHBOARD_QUERIES = {
+    f"{table} id range": f"SELECT (SELECT MIN(id) FROM {table}), (SELECT MAX(id) FROM {table})"
+    for table in ("cyber_incidents", "it_tickets", "datasets_metadata")
+}
+
+# "SCAN cyber_incidents" with no index clause is a full table scan
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+# ...unless it is the whole plan of an unfiltered, LIMIT-ed read: rows
+# come in rowid order with no sort step and the scan stops after LIMIT
+# rows. A filtered read must SEARCH an index, because a rare value would
+# make the scan read the whole table to fill one page.
+WHERE_CLAUSE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+LIMIT_CLAUSE = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+
+def explain_query_plan(conn, sql, params=()):
+    """
+    Return the EXPLAIN QUERY PLAN detail lines for a statement.
+
+    Returns:
+        list: Plan detail strings, e.g. 'SEARCH t USING INDEX idx (a=?)'
+    """
+    cursor = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    return [row[3] for row in cursor.fetchall()]
+
+
+def capture_queries(conn, func, *args):
+    """
+    Run a data helper and return the SELECT statements it executed.
+
+    Parameters are already bound into the captured SQL text.
+    """
+    # A cache hit would skip the SQL we want to capture
+    clear_query_cache()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        func(conn, *args)
+    finally:
+        conn.set_trace_callback(None)
+    return [sql for sql in statements
+            if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+
+
+def full_scans(conn, sql):
+    """
+    Return the plan lines of a statement that scan a whole table.
+
+    Returns:
+        list: Offending plan details (empty when the statement is indexed)
+    """
+    plan = explain_query_plan(conn, sql)
+    if len(plan) == 1 and LIMIT_CLAUSE.search(sql) and not WHERE_CLAUSE.search(sql):
+        return []
+    return [detail for detail in plan if FULL_SCAN.match(detail)]
+
+
+def find_full_scans(conn):
+    """
+    Check every dashboard query and report any that scan a whole table.
+
+    Returns:
+        dict: Query name -> offending plan lines (empty when all are indexed)
+    """
+    checks = dict(DASHBOARD_QUERIES)
+    calls = [(func, ()) for func in DASHBOARD_FUNCTIONS] + DASHBOARD_CALLS
+    for func, args in calls:
+        name = f"{func.__name__}({', '.join(map(repr, args))})" if args else func.__name__
+        for i, sql in enumerate(capture_queries(conn, func, *args)):
+            checks[f"{name}#{i}" if i else name] = sql
+
+    offenders = {}
+    for name, sql in checks.items():
+        scans = full_scans(conn, sql)
+        if scans:
+            offenders[name] = scans
+    return offenders
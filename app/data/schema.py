@@ -1,15 +1,103 @@
+from app.data.analytics import (add_resolution_range, create_resolution_objects,
+                                rebuild_resolution_times)
+from app.data.cache import bump_table_version, create_database_id, create_version_objects
+from app.data.search import add_search_range, create_search_objects
+from app.data.summaries import add_summary_range, create_summary_objects, rebuild_summaries
+from app.data.trends import add_trend_range, create_trend_objects, rebuild_trends
+
+# Text date columns that get an indexed integer epoch-day companion,
+# e.g. cyber_incidents.date -> cyber_incidents.date_day
+DAY_COLUMNS = {
+    "cyber_incidents": ["date"],
+    "it_tickets": ["created_date", "resolved_date"],
+    "datasets_metadata": ["last_updated"],
+}
+
+# Every date/timestamp text column, normalised to ISO-8601 on load
+DATE_COLUMNS = {
+    "cyber_incidents": ["date", "created_at"],
+    "it_tickets": ["created_date", "resolved_date", "created_at"],
+    "datasets_metadata": ["last_updated", "created_at"],
+}
+
+USERS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+        role TEXT DEFAULT 'user',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+CYBER_INCIDENTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS cyber_incidents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        incident_type TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        status TEXT DEFAULT 'open',
+        description TEXT,
+        reported_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+DATASETS_METADATA_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS datasets_metadata (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dataset_name TEXT NOT NULL,
+        category TEXT,
+        source TEXT,
+        last_updated TEXT,
+        record_count INTEGER,
+        file_size_mb REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+IT_TICKETS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS it_tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_id TEXT UNIQUE NOT NULL,
+        priority TEXT,
+        status TEXT,
+        category TEXT,
+        subject TEXT NOT NULL,
+        description TEXT,
+        created_date TEXT,
+        resolved_date TEXT,
+        assigned_to TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+INGESTION_MANIFEST_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS ingestion_manifest (
+        source_path TEXT PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        byte_offset INTEGER NOT NULL,
+        row_count INTEGER NOT NULL,
+        loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+SCHEMA_VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
 def create_users_table(conn):
     """Create users table."""
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL UNIQUE,
-            password_hash TEXT NOT NULL,
-            role TEXT DEFAULT 'user',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    cursor.execute(USERS_TABLE_SQL)
     conn.commit()
     print("✅ Users table created successfully!")
 
@@ -17,18 +105,7 @@ def create_users_table(conn):
 def create_cyber_incidents_table(conn):
     """Create cyber incidents table."""
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS cyber_incidents (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT,
-            incident_type TEXT NOT NULL,
-            severity TEXT NOT NULL,
-            status TEXT DEFAULT 'open',
-            description TEXT,
-            reported_by TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    cursor.execute(CYBER_INCIDENTS_TABLE_SQL)
     conn.commit()
     print("✅ Cyber Incidents table created successfully!")
 
@@ -36,18 +113,7 @@ def create_cyber_incidents_table(conn):
 def create_datasets_metadata_table(conn):
     """Create datasets metadata table."""
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS datasets_metadata (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            dataset_name TEXT NOT NULL,
-            category TEXT,
-            source TEXT,
-            last_updated TEXT,
-            record_count INTEGER,
-            file_size_mb REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    cursor.execute(DATASETS_METADATA_TABLE_SQL)
     conn.commit()
     print("✅ Datasets Metadata table created successfully!")
 
@@ -55,28 +121,301 @@ def create_datasets_metadata_table(conn):
 def create_it_tickets_table(conn):
     """Create IT tickets table."""
     cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS it_tickets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticket_id TEXT UNIQUE NOT NULL,
-            priority TEXT,
-            status TEXT,
-            category TEXT,
-            subject TEXT NOT NULL,
-            description TEXT,
-            created_date TEXT,
-            resolved_date TEXT,
-            assigned_to TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    cursor.execute(IT_TICKETS_TABLE_SQL)
     conn.commit()
     print("✅ IT Tickets table created successfully!")
 
 
+def create_ingestion_manifest_table(conn):
+    """Create the table recording which CSV bytes have been loaded."""
+    cursor = conn.cursor()
+    cursor.execute(INGESTION_MANIFEST_TABLE_SQL)
+    conn.commit()
+    print("✅ Ingestion Manifest table created successfully!")
+
+
+def create_date_columns(conn):
+    """
+    Add indexed epoch-day columns next to each domain date column.
+
+    The columns are virtual generated columns computed from the ISO text,
+    so every insert and update keeps them in step without extra code.
+    """
+    _add_date_columns(conn.cursor())
+    conn.commit()
+    print("✅ Date columns created successfully!")
+
+
+def backfill_iso_dates(conn):
+    """
+    Rewrite DD/MM/YYYY [HH:MM] text dates already in the database as ISO-8601.
+
+    Returns:
+        int: Number of values rewritten
+    """
+    updated = _backfill_iso_dates(conn.cursor())
+    conn.commit()
+    print(f"✅ Backfilled {updated} dates to ISO-8601")
+    return updated
+
+
+def _add_date_columns(cursor):
+    for table, columns in DAY_COLUMNS.items():
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_xinfo({table})")}
+        for column in columns:
+            day_column = f"{column}_day"
+            if day_column not in existing:
+                cursor.execute(f"""
+                    ALTER TABLE {table} ADD COLUMN {day_column} INTEGER
+                    GENERATED ALWAYS AS (CAST(julianday({column}) - 2440587.5 AS INTEGER)) VIRTUAL
+                """)
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_{day_column} ON {table}({day_column})")
+
+
+def _backfill_iso_dates(cursor):
+    updated = 0
+    for table, columns in DATE_COLUMNS.items():
+        for column in columns:
+            cursor.execute(f"""
+                UPDATE {table}
+                SET {column} = substr({column}, 7, 4) || '-' || substr({column}, 4, 2)
+                               || '-' || substr({column}, 1, 2)
+                WHERE {column} GLOB '[0-3][0-9]/[01][0-9]/[0-9][0-9][0-9][0-9]'
+            """)
+            updated += cursor.rowcount
+            cursor.execute(f"""
+                UPDATE {table}
+                SET {column} = substr({column}, 7, 4) || '-' || substr({column}, 4, 2)
+                               || '-' || substr({column}, 1, 2)
+                               || ' ' || substr({column}, 12, 5) || ':00'
+                WHERE {column} GLOB '[0-3][0-9]/[01][0-9]/[0-9][0-9][0-9][0-9] [0-2][0-9]:[0-5][0-9]'
+            """)
+            updated += cursor.rowcount
+    return updated
+
+
+# ---------- Migrations ----------
+# Each step receives a cursor inside an open transaction and must not
+# commit. Steps are written to be safe on databases that were created
+# before the migration runner existed.
+
+def _migration_base_tables(cursor):
+    for sql in (USERS_TABLE_SQL, CYBER_INCIDENTS_TABLE_SQL,
+                DATASETS_METADATA_TABLE_SQL, IT_TICKETS_TABLE_SQL):
+        cursor.execute(sql)
+
+
+def _migration_ingestion_manifest(cursor):
+    cursor.execute(INGESTION_MANIFEST_TABLE_SQL)
+
+
+def _migration_date_columns(cursor):
+    _add_date_columns(cursor)
+    _backfill_iso_dates(cursor)
+
+
+# Indexes backing the dashboard filters and GROUP BYs in incidents.py,
+# tickets.py and datasets.py; each one covers the query it serves
+DASHBOARD_INDEXES = {
+    "cyber_incidents": [("incident_type",), ("severity", "status"), ("status",)],
+    "it_tickets": [("priority",), ("status",), ("category",)],
+    "datasets_metadata": [("category",), ("source",)],
+}
+
+
+def _migration_dashboard_indexes(cursor):
+    for table, indexes in DASHBOARD_INDEXES.items():
+        for columns in indexes:
+            name = f"idx_{table}_{'_'.join(columns)}"
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(columns)})")
+    cursor.execute("ANALYZE")
+
+
+def _migration_summary_tables(cursor):
+    create_summary_objects(cursor)
+    rebuild_summaries(cursor)
+
+
+def _migration_table_versions(cursor):
+    create_version_objects(cursor)
+
+
+# Single-column indexes the paginated explorer seeks on: each keeps its
+# rows in id order, so "filter = ? ORDER BY id" needs no sort
+EXPLORER_INDEXES = {
+    "cyber_incidents": ["severity"],
+    "it_tickets": ["assigned_to"],
+}
+
+
+def _migration_explorer_indexes(cursor):
+    for table, columns in EXPLORER_INDEXES.items():
+        for column in columns:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column})")
+    cursor.execute("ANALYZE")
+
+
+def _migration_search_indexes(cursor):
+    create_search_objects(cursor)
+
+
+def _migration_trend_rollups(cursor):
+    create_trend_objects(cursor)
+    rebuild_trends(cursor)
+
+
+def _migration_resolution_times(cursor):
+    create_resolution_objects(cursor)
+    rebuild_resolution_times(cursor)
+
+
+def _migration_database_id(cursor):
+    create_database_id(cursor)
+
+
+def _migration_adopt_preloaded_csvs(cursor):
+    # Databases filled from the bundled CSVs before the manifest existed
+    # would otherwise load every file a second time
+    from app.data.db import CSV_SOURCES, adopt_csv_file
+    for csv_path, table in CSV_SOURCES:
+        adopt_csv_file(cursor, csv_path, table)
+
+
+# (version, description, step) in the order they must be applied.
+# Append new steps with the next number; never renumber or edit shipped ones.
+MIGRATIONS = [
+    (1, "Create base tables", _migration_base_tables),
+    (2, "Create ingestion manifest", _migration_ingestion_manifest),
+    (3, "Add epoch-day date columns and backfill ISO dates", _migration_date_columns),
+    (4, "Add dashboard query indexes", _migration_dashboard_indexes),
+    (5, "Add trigger-maintained summary tables", _migration_summary_tables),
+    (6, "Add table version counters for the query cache", _migration_table_versions),
+    (7, "Add raw-data explorer indexes", _migration_explorer_indexes),
+    (8, "Add full-text search indexes", _migration_search_indexes),
+    (9, "Add trigger-maintained trend rollups", _migration_trend_rollups),
+    (10, "Add ticket resolution-time histogram", _migration_resolution_times),
+    (11, "Add a database identity for cache keys", _migration_database_id),
+    (12, "Adopt CSV files loaded before the manifest", _migration_adopt_preloaded_csvs),
+]
+
+
+def get_schema_version(conn):
+    """
+    Return the highest migration version applied (0 for a new database).
+
+    Read-only: the schema_version table is created by the first migration.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not exists:
+        return 0
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def run_migrations(conn, dry_run=False):
+    """
+    Apply every pending migration, each in its own transaction.
+
+    A failing step is rolled back and re-raised, leaving the database at
+    the last successfully applied version.
+
+    Args:
+        conn: Database connection
+        dry_run: Only report which migrations would be applied; the
+            database is not modified and no transaction is committed
+
+    Returns:
+        list: Versions applied (or pending, for a dry run)
+    """
+    current = get_schema_version(conn)
+    pending = [m for m in MIGRATIONS if m[0] > current]
+
+    if not pending:
+        print(f"✅ Schema is up to date (version {current})")
+        return []
+
+    applied = []
+    for version, description, step in pending:
+        if dry_run:
+            print(f"   Would apply migration {version}: {description}")
+            applied.append(version)
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.cursor()
+            cursor.execute(SCHEMA_VERSION_TABLE_SQL)
+            step(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        print(f"✅ Applied migration {version}: {description}")
+        applied.append(version)
+
+    return applied
+
+
+# ---------- Bulk loads ----------
+# Every derived table is kept current by a per-row AFTER INSERT trigger,
+# which turns one executemany into dozens of upserts per row. bulk_insert
+# drops these triggers for the load and, in the same transaction, restores
+# them and applies the new id range with one set-based statement per
+# derived table, so the results equal those of the triggers.
+
+def _bulk_insert_refreshers(table):
+    """Map each derived-data insert trigger name on `table` to its set-based equivalent."""
+    return {
+        f"trg_{table}_summary_insert": add_summary_range,
+        f"trg_{table}_trend_insert": add_trend_range,
+        f"trg_{table}_resolution_insert":
+            lambda cursor, table, first_id, last_id: add_resolution_range(
+                cursor, first_id, last_id),
+        f"trg_{table}_fts_insert": add_search_range,
+        f"trg_{table}_version_insert":
+            lambda cursor, table, first_id, last_id: bump_table_version(cursor, table),
+    }
+
+
+def drop_insert_triggers(cursor, table):
+    """
+    Drop the derived-data insert triggers of `table` for a bulk load (no commit).
+
+    Returns:
+        list: (name, CREATE TRIGGER sql) of each dropped trigger, for
+            restore_insert_triggers
+    """
+    names = list(_bulk_insert_refreshers(table))
+    triggers = cursor.execute(f"""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'trigger' AND tbl_name = ? AND name IN ({', '.join('?' for _ in names)})
+    """, (table, *names)).fetchall()
+    for name, _ in triggers:
+        cursor.execute(f"DROP TRIGGER {name}")
+    return [(name, sql) for name, sql in triggers]
+
+
+def restore_insert_triggers(cursor, table, triggers, first_id, last_id):
+    """
+    Recreate triggers dropped by drop_insert_triggers and apply rows
+    first_id..last_id of `table` to their derived tables (no commit).
+    """
+    refreshers = _bulk_insert_refreshers(table)
+    for name, sql in triggers:
+        cursor.execute(sql)
+        if last_id >= first_id:
+            refreshers[name](cursor, table, first_id, last_id)
+
+
 def create_all_tables(conn):
-    """Create all tables."""
-    create_users_table(conn)
-    create_cyber_incidents_table(conn)
-    create_datasets_metadata_table(conn)
-    create_it_tickets_table(conn)
+    """Create all tables by bringing the schema up to the latest version."""
+    run_migrations(conn)
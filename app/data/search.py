@@ -0,0 +1,135 @@
+import re
+import pandas as pd
+from app.data.cache import read_sql_cached
+
+# Full-text indexed columns per table; each gets a <table>_fts FTS5 table
+SEARCH_COLUMNS = {
+    "cyber_incidents": ["description"],
+    "it_tickets": ["subject", "description"],
+}
+
+# BM25 weight of each indexed column, in SEARCH_COLUMNS order; a hit in a
+# ticket's subject counts for more than one in its description
+SEARCH_WEIGHTS = {
+    "cyber_incidents": [1.0],
+    "it_tickets": [2.0, 1.0],
+}
+
+# Markers wrapped around matched terms in snippets (Markdown bold)
+HIGHLIGHT_OPEN = "**"
+HIGHLIGHT_CLOSE = "**"
+SNIPPET_TOKENS = 12
+
+# Shorter trailing words match exactly: a one- or two-letter prefix expands
+# to so many terms that ranking the hits dominates the search time
+MIN_PREFIX_LENGTH = 3
+
+
+def create_search_objects(cursor):
+    """
+    Create the FTS5 tables, their sync triggers, and index existing rows (no commit).
+
+    The FTS tables are external-content tables: they store only the index
+    and read the text back from the domain table, so no text is duplicated.
+    Each table's rank column is configured as BM25 with SEARCH_WEIGHTS.
+    """
+    for table, columns in SEARCH_COLUMNS.items():
+        fts = f"{table}_fts"
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {column_list}, content='{table}', content_rowid='id'
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        """)
+        weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS[table])
+        cursor.execute(f"INSERT INTO {fts} ({fts}, rank) VALUES ('rank', 'bm25({weights})')")
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def add_search_range(cursor, table, first_id, last_id):
+    """
+    Index rows first_id..last_id of `table` (no commit).
+
+    The set-based equivalent of the insert trigger, for rows bulk-loaded
+    with it dropped (see db.bulk_insert).
+    """
+    fts = f"{table}_fts"
+    column_list = ", ".join(SEARCH_COLUMNS[table])
+    cursor.execute(f"""
+        INSERT INTO {fts} (rowid, {column_list})
+        SELECT id, {column_list} FROM {table} WHERE id BETWEEN ? AND ?
+    """, (first_id, last_id))
+
+
+def fts_query(text):
+    """
+    Turn free text from a search box into a safe FTS5 MATCH expression.
+
+    Every word must appear (implicit AND); the last word also matches as a
+    prefix, once it has MIN_PREFIX_LENGTH characters, so results update
+    while typing. Quoting each word means FTS5 operators and punctuation in
+    the input cannot cause syntax errors.
+
+    Returns:
+        str: MATCH expression, or None if the text has no searchable words
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if len(words[-1]) >= MIN_PREFIX_LENGTH:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_table(conn, table, result_columns, text, limit):
+    """
+    Rank a table's rows against free text with BM25 and highlight the matches.
+
+    Args:
+        conn: Database connection
+        table: Table with an FTS index in SEARCH_COLUMNS
+        result_columns: Columns of `table` to return with each hit
+        text: Search box text
+        limit: Maximum number of hits
+
+    Returns:
+        pandas.DataFrame: `result_columns` plus snippet and rank (best first;
+            lower rank is better)
+    """
+    match = fts_query(text)
+    if match is None:
+        return pd.DataFrame(columns=[*result_columns, "snippet", "rank"])
+
+    fts = f"{table}_fts"
+    selected = ", ".join(f"t.{column}" for column in result_columns)
+    query = f"""
+    SELECT {selected},
+           snippet({fts}, -1, '{HIGHLIGHT_OPEN}', '{HIGHLIGHT_CLOSE}', ' … ', {SNIPPET_TOKENS}) AS snippet,
+           {fts}.rank AS rank
+    FROM {fts}
+    JOIN {table} t ON t.id = {fts}.rowid
+    WHERE {fts} MATCH ?
+    ORDER BY {fts}.rank
+    LIMIT ?
+    """
+    return read_sql_cached(query, conn, (table,), (match, limit))
@@ -0,0 +1,228 @@
+from app.data.cache import read_sql_cached
+
+# Columns counted per domain table. A pair such as ("severity", "status")
+# is counted per combination, with the second column stored in sub_value.
+SUMMARY_DIMENSIONS = {
+    "cyber_incidents": [("status",), ("severity",), ("incident_type",), ("severity", "status")],
+    "it_tickets": [("priority",), ("status",), ("category",)],
+    "datasets_metadata": [("category",), ("source",)],
+}
+
+# Numeric columns summed into summary_totals
+SUMMARY_SUMS = {
+    "datasets_metadata": ["record_count", "file_size_mb"],
+}
+
+SUMMARY_COUNTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS summary_counts (
+        table_name TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        value TEXT NOT NULL,
+        sub_value TEXT NOT NULL DEFAULT '',
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (table_name, dimension, value, sub_value)
+    ) WITHOUT ROWID
+"""
+
+SUMMARY_TOTALS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS summary_totals (
+        table_name TEXT PRIMARY KEY,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        record_count INTEGER NOT NULL DEFAULT 0,
+        file_size_mb REAL NOT NULL DEFAULT 0
+    )
+"""
+
+
+def _dimension_name(columns):
+    return ",".join(columns)
+
+
+def _count_statements(table, row, delta):
+    """Upserts that add `delta` to every summary bucket `row` (NEW/OLD) falls in."""
+    statements = []
+    for columns in SUMMARY_DIMENSIONS[table]:
+        value = f"IFNULL({row}.{columns[0]}, '')"
+        sub_value = f"IFNULL({row}.{columns[1]}, '')" if len(columns) > 1 else "''"
+        statements.append(f"""
+            INSERT INTO summary_counts (table_name, dimension, value, sub_value, count)
+            VALUES ('{table}', '{_dimension_name(columns)}', {value}, {sub_value}, {delta})
+            ON CONFLICT (table_name, dimension, value, sub_value)
+            DO UPDATE SET count = count + ({delta});""")
+
+    sums = "".join(
+        f", {column} = {column} + ({delta}) * IFNULL({row}.{column}, 0)"
+        for column in SUMMARY_SUMS.get(table, []))
+    statements.append(f"""
+            UPDATE summary_totals SET row_count = row_count + ({delta}){sums}
+            WHERE table_name = '{table}';""")
+    return "".join(statements)
+
+
+def summary_trigger_sql(table):
+    """
+    Build the INSERT/UPDATE/DELETE triggers that keep one table's summaries current.
+
+    Returns:
+        list: CREATE TRIGGER statements
+    """
+    watched = sorted({c for columns in SUMMARY_DIMENSIONS[table] for c in columns}
+                     | set(SUMMARY_SUMS.get(table, [])))
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_insert
+        AFTER INSERT ON {table} BEGIN{_count_statements(table, "NEW", 1)}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_delete
+        AFTER DELETE ON {table} BEGIN{_count_statements(table, "OLD", -1)}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_update
+        AFTER UPDATE OF {', '.join(watched)} ON {table} BEGIN{_count_statements(table, "OLD", -1)}{_count_statements(table, "NEW", 1)}
+        END""",
+    ]
+
+
+def create_summary_objects(cursor):
+    """Create the summary tables and their triggers (no commit)."""
+    cursor.execute(SUMMARY_COUNTS_TABLE_SQL)
+    cursor.execute(SUMMARY_TOTALS_TABLE_SQL)
+    for table in SUMMARY_DIMENSIONS:
+        for sql in summary_trigger_sql(table):
+            cursor.execute(sql)
+
+
+def rebuild_summaries(cursor):
+    """
+    Recompute every summary row from the domain tables (no commit).
+
+    Use after bulk edits made with the triggers dropped, or to repair drift.
+    """
+    cursor.execute("DELETE FROM summary_counts")
+    cursor.execute("DELETE FROM summary_totals")
+    for table, dimensions in SUMMARY_DIMENSIONS.items():
+        for columns in dimensions:
+            sub_value = f"IFNULL({columns[1]}, '')" if len(columns) > 1 else "''"
+            cursor.execute(f"""
+                INSERT INTO summary_counts (table_name, dimension, value, sub_value, count)
+                SELECT '{table}', '{_dimension_name(columns)}', IFNULL({columns[0]}, ''),
+                       {sub_value}, COUNT(*)
+                FROM {table}
+                GROUP BY 3, 4
+            """)
+
+        sums = SUMMARY_SUMS.get(table, [])
+        sum_columns = "".join(f", {column}" for column in sums)
+        sum_values = "".join(f", IFNULL(SUM({column}), 0)" for column in sums)
+        cursor.execute(f"""
+            INSERT INTO summary_totals (table_name, row_count{sum_columns})
+            SELECT '{table}', COUNT(*){sum_values} FROM {table}
+        """)
+
+
+def add_summary_range(cursor, table, first_id, last_id):
+    """
+    Count rows first_id..last_id of `table` into the summaries (no commit).
+
+    The set-based equivalent of the insert trigger, for rows bulk-loaded
+    with it dropped (see db.bulk_insert).
+    """
+    for columns in SUMMARY_DIMENSIONS[table]:
+        sub_value = f"IFNULL({columns[1]}, '')" if len(columns) > 1 else "''"
+        cursor.execute(f"""
+            INSERT INTO summary_counts (table_name, dimension, value, sub_value, count)
+            SELECT '{table}', '{_dimension_name(columns)}', IFNULL({columns[0]}, ''),
+                   {sub_value}, COUNT(*)
+            FROM {table}
+            WHERE id BETWEEN ? AND ?
+            GROUP BY 3, 4
+            ON CONFLICT (table_name, dimension, value, sub_value)
+            DO UPDATE SET count = count + excluded.count
+        """, (first_id, last_id))
+
+    sums = SUMMARY_SUMS.get(table, [])
+    sum_updates = "".join(f", {column} = summary_totals.{column} + added.{column}"
+                          for column in sums)
+    sum_values = "".join(f", IFNULL(SUM({column}), 0) AS {column}" for column in sums)
+    cursor.execute(f"""
+        UPDATE summary_totals
+        SET row_count = summary_totals.row_count + added.row_count{sum_updates}
+        FROM (SELECT COUNT(*) AS row_count{sum_values}
+              FROM {table} WHERE id BETWEEN ? AND ?) AS added
+        WHERE table_name = '{table}'
+    """, (first_id, last_id))
+
+
+def read_summary_counts(conn, table, dimension, label, value=None, min_count=0):
+    """
+    Read one dimension's counts from summary_counts, largest first.
+
+    Args:
+        conn: Database connection
+        table: Domain table the counts describe
+        dimension: Column name, or "a,b" for a pair
+        label: Name for the counted column in the result
+        value: For a pair, fix the first column and count by the second
+        min_count: Only return buckets with more than this many rows
+
+    Returns:
+        pandas.DataFrame: Columns `label` and `count`
+    """
+    column = "value" if value is None else "sub_value"
+    query = f"""
+    SELECT NULLIF({column}, '') AS {label}, count
+    FROM summary_counts
+    WHERE table_name = ? AND dimension = ? AND count > ?
+    """
+    params = [table, dimension, min_count]
+    if value is not None:
+        query += " AND value = ?"
+        params.append(value)
+    query += " ORDER BY count DESC"
+    return read_sql_cached(query, conn, (table,), params)
+
+
+def read_summary_values(conn, table, columns):
+    """
+    List the values present in single-column summary dimensions.
+
+    Used for filter widgets, so they offer exactly what the table holds.
+
+    Returns:
+        dict: column -> sorted list of non-empty values
+    """
+    return {column: sorted(read_summary_counts(conn, table, column, "value")["value"].dropna())
+            for column in columns}
+
+
+def read_summary_count(conn, table, dimension, value):
+    """Return the number of rows in one summary bucket (0 if empty)."""
+    row = conn.execute("""
+        SELECT count FROM summary_counts
+        WHERE table_name = ? AND dimension = ? AND value = ? AND sub_value = ''
+    """, (table, dimension, value)).fetchone()
+    return row[0] if row else 0
+
+
+def read_summary_totals(conn, table):
+    """
+    Return (row_count, record_count, file_size_mb) for a domain table.
+    """
+    row = conn.execute(
+        "SELECT row_count, record_count, file_size_mb FROM summary_totals WHERE table_name = ?",
+        (table,)
+    ).fetchone()
+    return row if row else (0, 0, 0.0)
+
+
+def main():
+    """Rebuild the summary tables of the platform database."""
+    from app.data.db import connect_database, transaction
+
+    conn = connect_database()
+    with transaction(conn):
+        rebuild_summaries(conn.cursor())
+    conn.close()
+    print("✅ Summary tables rebuilt successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,25 @@
-import pandas as pd
-from app.data.db import connect_database
+from app.data.analytics import read_resolution_stats
+from app.data.cache import cached_call, read_sql_cached
+from app.data.db import BULK_BATCH_SIZE, bulk_insert, use_connection
+from app.data.frames import read_table_compact
+from app.data.pagination import ITER_BATCH_SIZE, PAGE_SIZE, fetch_page, iter_models
+from app.data.search import search_table
+from app.data.summaries import (read_summary_count, read_summary_counts, read_summary_totals,
+                                read_summary_values)
+from app.data.trends import read_trend
+from models.it_ticket import ITTicket
+
+# Insert order used by the bulk API
+TICKET_COLUMNS = ("ticket_id", "priority", "status", "category", "subject", "description",
+                  "created_date", "resolved_date", "assigned_to")
+
+# Columns the raw-data explorer may filter on
+TICKET_FILTERS = ("priority", "status", "category", "assigned_to")
+
+# Columns returned with each search hit
+TICKET_SEARCH_COLUMNS = ("id", "ticket_id", "priority", "status", "subject", "assigned_to")
+
+SEARCH_LIMIT = 20
 
 
 def insert_ticket(conn, ticket_id, priority, status, category, subject, description,
@@ -8,6 +28,7 @@ def insert_ticket(conn, ticket_id, priority, status, category, subject, descript
     Insert a new IT ticket into the database.
 
     Args:
+        conn: Database connection (None to use the shared pool)
         ticket_id: Unique ticket ID (e.g., 'TKT-001')
         priority: Priority level (e.g., 'Critical', 'High', 'Medium', 'Low')
         status: Current status (e.g., 'Open', 'In Progress', 'Resolved', 'Closed')
@@ -21,77 +42,206 @@ def insert_ticket(conn, ticket_id, priority, status, category, subject, descript
     Returns:
         int: ID of the inserted ticket
     """
-    conn = connect_database()
-    cursor = conn.cursor()
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            INSERT INTO it_tickets 
+            (ticket_id, priority, status, category, subject, description, 
+             created_date, resolved_date, assigned_to)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (ticket_id, priority, status, category, subject, description,
+              created_date, resolved_date, assigned_to))
 
-    cursor.execute("""
-        INSERT INTO it_tickets 
-        (ticket_id, priority, status, category, subject, description, 
-         created_date, resolved_date, assigned_to)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (ticket_id, priority, status, category, subject, description,
-          created_date, resolved_date, assigned_to))
+        conn.commit()
+        return cursor.lastrowid
 
-    conn.commit()
-    ticket_db_id = cursor.lastrowid
-    conn.close()
 
-    return ticket_db_id
+def insert_tickets_bulk(conn, tickets, batch_size=BULK_BATCH_SIZE):
+    """
+    Insert many tickets in a single transaction.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        tickets: DataFrame, or iterable of tuples in TICKET_COLUMNS order
+            (or dicts keyed by column name); generators are streamed
+        batch_size: Rows sent to each executemany call
+
+    Returns:
+        range: IDs of the inserted tickets
+    """
+    with use_connection(conn) as conn:
+        return bulk_insert(conn, "it_tickets", TICKET_COLUMNS, tickets, batch_size)
 
 
-def get_all_tickets(conn):
+def get_all_tickets(conn, compact=False, arrow=False):
     """
     Get all IT tickets as DataFrame.
 
+    Args:
+        conn: Database connection (None to use the shared pool)
+        compact: Return a memory-lean frame (categoricals, downcast numbers,
+            datetime dates); see app.data.frames.compact_frame
+        arrow: With compact, also use pyarrow-backed dtypes
+
+    Returns:
+        pandas.DataFrame: All tickets ordered by ID descending (a private copy that is safe
+            to modify)
+    """
+    query = "SELECT * FROM it_tickets ORDER BY id DESC"
+    with use_connection(conn) as conn:
+        if compact:
+            return read_table_compact(query, conn, "it_tickets", arrow).copy()
+        return read_sql_cached(query, conn, ("it_tickets",)).copy()
+
+
+def get_tickets_page(conn, filters=None, sort_by="id", descending=True, cursor=None,
+                     page_size=PAGE_SIZE):
+    """
+    Fetch one page of tickets for the raw-data explorer.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        filters: Dict with any of priority, status, category, assigned_to (a value
+            or list of values), plus "start"/"end" dates bounding created_date
+        sort_by: "id" or "created_date"
+        descending: Newest first when True
+        cursor: next_cursor of the previous page, or None for the first page
+        page_size: Rows per page
+
+    Returns:
+        Page: rows, next_cursor, total and total_is_exact
+    """
+    with use_connection(conn) as conn:
+        return fetch_page(conn, "it_tickets", filters, TICKET_FILTERS, "created_date",
+                          sort_by, descending, cursor, page_size)
+
+
+def iter_tickets(conn, filters=None, batch_size=ITER_BATCH_SIZE):
+    """
+    Stream tickets as ITTicket objects in id order, without pandas.
+
+    A pooled connection is held until the generator is exhausted or closed.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        filters: Same as get_tickets_page
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        ITTicket
+    """
+    with use_connection(conn) as conn:
+        yield from iter_models(conn, "it_tickets", ITTicket, filters, TICKET_FILTERS,
+                               "created_date", batch_size)
+
+
+def search_tickets(conn, query, limit=SEARCH_LIMIT):
+    """
+    Full-text search over ticket subjects and descriptions, best matches first.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        query: Words to look for; all must match, the last also as a prefix
+        limit: Maximum number of results
+
     Returns:
-        pandas.DataFrame: All tickets ordered by ID descending
+        pandas.DataFrame: TICKET_SEARCH_COLUMNS plus a highlighted snippet and
+            BM25 rank
     """
-    conn = connect_database()
-    df = pd.read_sql_query(
-        "SELECT * FROM it_tickets ORDER BY id DESC",
-        conn
-    )
-    conn.close()
-    return df
+    with use_connection(conn) as conn:
+        return search_table(conn, "it_tickets", TICKET_SEARCH_COLUMNS, query, limit)
+
 
 def get_tickets_by_priority(conn):
     """
     Get tickets by priority
+    Reads the trigger-maintained summary_counts table.
     """
-    query = """
-    SELECT priority, COUNT(*) as count
-    FROM it_tickets
-    GROUP BY priority
-    ORDER BY count DESC
-    """
-    df = pd.read_sql_query(query, conn)
-    return df
+    with use_connection(conn) as conn:
+        return read_summary_counts(conn, "it_tickets", "priority", "priority")
 
 def get_tickets_by_status(conn):
     """
     Get tickets by status
+    Reads the trigger-maintained summary_counts table.
     """
-    query = """
-    SELECT status, COUNT(*) as count
-    FROM it_tickets
-    GROUP BY status
-    ORDER BY count DESC
-    """
-    df = pd.read_sql_query(query, conn)
-    return df
+    with use_connection(conn) as conn:
+        return read_summary_counts(conn, "it_tickets", "status", "status")
 
 def get_tickets_by_category(conn):
     """
     Get tickets by category
+    Reads the trigger-maintained summary_counts table.
+    """
+    with use_connection(conn) as conn:
+        return read_summary_counts(conn, "it_tickets", "category", "category")
+
+
+def get_ticket_filter_options(conn):
+    """
+    Values offered by the ticket explorer's filters.
+    Reads the trigger-maintained summary_counts table.
+
+    Returns:
+        dict: column -> sorted list of values present in it_tickets
+    """
+    with use_connection(conn) as conn:
+        return read_summary_values(conn, "it_tickets", ("priority", "status", "category"))
+
+
+def get_ticket_kpis(conn):
+    """
+    Headline ticket counts for the dashboard, read from the summary tables.
+
+    Returns:
+        dict: total, critical and open ticket counts
+    """
+    with use_connection(conn) as conn:
+        return cached_call(conn, ("get_ticket_kpis",), ("it_tickets",), lambda: {
+            "total": read_summary_totals(conn, "it_tickets")[0],
+            "critical": read_summary_count(conn, "it_tickets", "priority", "Critical"),
+            "open": read_summary_count(conn, "it_tickets", "status", "Open"),
+        })
+
+
+def get_ticket_trend(conn, granularity="week", start=None, end=None, by=None):
+    """
+    Tickets opened vs resolved over time, read from the trend rollups.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        granularity: "day", "week" or "month"
+        start: First date to include (date or ISO string); None for all history
+        end: Last date to include; None for no upper bound
+        by: None for overall counts, or "priority" or "category"
+
+    Returns:
+        pandas.DataFrame: bucket (first day of each period), the `by` column
+            when given, and the opened and resolved counts of each bucket
+    """
+    with use_connection(conn) as conn:
+        return read_trend(conn, "it_tickets", granularity, start, end, by)
+
+
+def get_resolution_stats(conn, by=None):
     """
-    query = """
-    SELECT category, COUNT(*) as count
-    FROM it_tickets
-    GROUP BY category
-    ORDER BY count DESC
+    Mean, median and p90 days to resolve, and SLA compliance, of resolved tickets.
+
+    Computed from the trigger-maintained resolution_times histogram, so the
+    cost does not grow with the number of tickets; resolve_ticket() updates
+    it in the same transaction.
+
+    Args:
+        conn: Database connection (None to use the shared pool)
+        by: None for all tickets, or "priority", "category" or "assigned_to"
+
+    Returns:
+        pandas.DataFrame: The `by` column when given, tickets, mean_days,
+            median_days, p90_days and within_sla (0-1)
     """
-    df = pd.read_sql_query(query, conn)
-    return df
+    with use_connection(conn) as conn:
+        return read_resolution_stats(conn, by)
 
 
 def update_ticket_status(conn, ticket_id, new_status):
@@ -105,19 +255,16 @@ def update_ticket_status(conn, ticket_id, new_status):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
 
-    cursor.execute(
-        "UPDATE it_tickets SET status = ? WHERE id = ?",
-        (new_status, ticket_id)
-    )
+        cursor.execute(
+            "UPDATE it_tickets SET status = ? WHERE id = ?",
+            (new_status, ticket_id)
+        )
 
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-
-    return rows_affected
+        conn.commit()
+        return cursor.rowcount
 
 
 def update_ticket_assignment(conn, ticket_id, assigned_to):
@@ -131,19 +278,16 @@ def update_ticket_assignment(conn, ticket_id, assigned_to):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "UPDATE it_tickets SET assigned_to = ? WHERE id = ?",
-        (assigned_to, ticket_id)
-    )
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
 
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
+        cursor.execute(
+            "UPDATE it_tickets SET assigned_to = ? WHERE id = ?",
+            (assigned_to, ticket_id)
+        )
 
-    return rows_affected
+        conn.commit()
+        return cursor.rowcount
 
 
 def resolve_ticket(conn, ticket_id, resolved_date):
@@ -157,19 +301,16 @@ def resolve_ticket(conn, ticket_id, resolved_date):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
 
-    cursor.execute(
-        "UPDATE it_tickets SET status = 'Resolved', resolved_date = ? WHERE id = ?",
-        (resolved_date, ticket_id)
-    )
+        cursor.execute(
+            "UPDATE it_tickets SET status = 'Resolved', resolved_date = ? WHERE id = ?",
+            (resolved_date, ticket_id)
+        )
 
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
-
-    return rows_affected
+        conn.commit()
+        return cursor.rowcount
 
 
 def delete_ticket(conn, ticket_id):
@@ -182,16 +323,13 @@ def delete_ticket(conn, ticket_id):
     Returns:
         int: Number of rows affected
     """
-    conn = connect_database()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "DELETE FROM it_tickets WHERE id = ?",
-        (ticket_id,)
-    )
+    with use_connection(conn) as conn:
+        cursor = conn.cursor()
 
-    conn.commit()
-    rows_affected = cursor.rowcount
-    conn.close()
+        cursor.execute(
+            "DELETE FROM it_tickets WHERE id = ?",
+            (ticket_id,)
+        )
 
-    return rows_affected
+        conn.commit()
+        return cursor.rowcount
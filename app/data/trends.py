@@ -0,0 +1,212 @@
+from datetime import date, datetime, timedelta
+from app.data.cache import read_sql_cached
+
+# Dated events counted per domain table: event name -> ISO date column
+TREND_EVENTS = {
+    "cyber_incidents": {"reported": "date"},
+    "it_tickets": {"opened": "created_date", "resolved": "resolved_date"},
+}
+
+# Columns each event can be broken down by ('' is the overall count)
+TREND_DIMENSIONS = {
+    "cyber_incidents": ["", "severity", "incident_type"],
+    "it_tickets": ["", "priority", "category"],
+}
+
+# SQLite date() modifiers mapping a date to the first day of its bucket;
+# weeks start on Monday
+GRANULARITIES = {
+    "day": "",
+    "week": ", 'weekday 0', '-6 days'",
+    "month": ", 'start of month'",
+}
+
+# Ordered so one index range covers a trend query: the bucket range of one
+# (table, event, granularity, dimension) is contiguous however long the history
+TREND_COUNTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS trend_counts (
+        table_name TEXT NOT NULL,
+        event TEXT NOT NULL,
+        granularity TEXT NOT NULL,
+        dimension TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        value TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (table_name, event, granularity, dimension, bucket, value)
+    ) WITHOUT ROWID
+"""
+
+
+def _trend_statements(table, row, delta):
+    """Upserts that add `delta` to every trend bucket `row` (NEW/OLD) falls in."""
+    statements = []
+    for event, column in TREND_EVENTS[table].items():
+        for granularity, modifiers in GRANULARITIES.items():
+            for dimension in TREND_DIMENSIONS[table]:
+                value = f"IFNULL({row}.{dimension}, '')" if dimension else "''"
+                statements.append(f"""
+            INSERT INTO trend_counts (table_name, event, granularity, dimension, bucket, value, count)
+            SELECT '{table}', '{event}', '{granularity}', '{dimension}',
+                   date({row}.{column}{modifiers}), {value}, {delta}
+            WHERE date({row}.{column}) IS NOT NULL
+            ON CONFLICT (table_name, event, granularity, dimension, bucket, value)
+            DO UPDATE SET count = count + ({delta});""")
+    return "".join(statements)
+
+
+def trend_trigger_sql(table):
+    """
+    Build the INSERT/UPDATE/DELETE triggers that keep one table's rollups current.
+
+    Returns:
+        list: CREATE TRIGGER statements
+    """
+    watched = sorted(set(TREND_EVENTS[table].values())
+                     | {dimension for dimension in TREND_DIMENSIONS[table] if dimension})
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_trend_insert
+        AFTER INSERT ON {table} BEGIN{_trend_statements(table, "NEW", 1)}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_trend_delete
+        AFTER DELETE ON {table} BEGIN{_trend_statements(table, "OLD", -1)}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_trend_update
+        AFTER UPDATE OF {', '.join(watched)} ON {table} BEGIN{_trend_statements(table, "OLD", -1)}{_trend_statements(table, "NEW", 1)}
+        END""",
+    ]
+
+
+def create_trend_objects(cursor):
+    """Create the trend rollup table and its triggers (no commit)."""
+    cursor.execute(TREND_COUNTS_TABLE_SQL)
+    for table in TREND_EVENTS:
+        for sql in trend_trigger_sql(table):
+            cursor.execute(sql)
+
+
+def rebuild_trends(cursor):
+    """Recompute every trend bucket from the domain tables (no commit)."""
+    cursor.execute("DELETE FROM trend_counts")
+    for table, events in TREND_EVENTS.items():
+        for event, column in events.items():
+            for granularity, modifiers in GRANULARITIES.items():
+                for dimension in TREND_DIMENSIONS[table]:
+                    value = f"IFNULL({dimension}, '')" if dimension else "''"
+                    cursor.execute(f"""
+                        INSERT INTO trend_counts
+                            (table_name, event, granularity, dimension, bucket, value, count)
+                        SELECT '{table}', '{event}', '{granularity}', '{dimension}',
+                               date({column}{modifiers}), {value}, COUNT(*)
+                        FROM {table}
+                        WHERE date({column}) IS NOT NULL
+                        GROUP BY 5, 6
+                    """)
+
+
+def add_trend_range(cursor, table, first_id, last_id):
+    """
+    Count rows first_id..last_id of `table` into the trend rollups (no commit).
+
+    The set-based equivalent of the insert trigger, for rows bulk-loaded
+    with it dropped (see db.bulk_insert).
+    """
+    for event, column in TREND_EVENTS[table].items():
+        for granularity, modifiers in GRANULARITIES.items():
+            for dimension in TREND_DIMENSIONS[table]:
+                value = f"IFNULL({dimension}, '')" if dimension else "''"
+                cursor.execute(f"""
+                    INSERT INTO trend_counts
+                        (table_name, event, granularity, dimension, bucket, value, count)
+                    SELECT '{table}', '{event}', '{granularity}', '{dimension}',
+                           date({column}{modifiers}), {value}, COUNT(*)
+                    FROM {table}
+                    WHERE id BETWEEN ? AND ? AND date({column}) IS NOT NULL
+                    GROUP BY 5, 6
+                    ON CONFLICT (table_name, event, granularity, dimension, bucket, value)
+                    DO UPDATE SET count = count + excluded.count
+                """, (first_id, last_id))
+
+
+def bucket_start(value, granularity):
+    """
+    Return the ISO date of the first day of the bucket containing `value`.
+
+    Args:
+        value: date, datetime or ISO date string
+        granularity: "day", "week" or "month"
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity {granularity}")
+    if isinstance(value, datetime):
+        value = value.date()
+    elif isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if granularity == "week":
+        value -= timedelta(days=value.weekday())
+    elif granularity == "month":
+        value = value.replace(day=1)
+    return value.isoformat()
+
+
+def read_trend(conn, table, granularity, start=None, end=None, by=None):
+    """
+    Read per-bucket event counts from trend_counts, oldest bucket first.
+
+    Cost depends on the number of buckets in the range, not on the size
+    of the domain table.
+
+    Args:
+        conn: Database connection
+        table: Domain table in TREND_EVENTS
+        granularity: "day", "week" or "month"
+        start: First date to include (date or ISO string); None for all history
+        end: Last date to include; None for no upper bound
+        by: Dimension from TREND_DIMENSIONS to break counts down by
+
+    Returns:
+        pandas.DataFrame: bucket, the `by` column when given, and one count
+            column per event
+    """
+    dimension = by or ""
+    if dimension not in TREND_DIMENSIONS[table]:
+        raise ValueError(f"Cannot break {table} trends down by {by}")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity {granularity}")
+
+    events = list(TREND_EVENTS[table])
+    conditions = ["table_name = ?", f"event IN ({', '.join('?' for _ in events)})",
+                  "granularity = ?", "dimension = ?"]
+    params = [table, *events, granularity, dimension]
+    if start is not None:
+        conditions.append("bucket >= ?")
+        params.append(bucket_start(start, granularity))
+    if end is not None:
+        conditions.append("bucket <= ?")
+        params.append(bucket_start(end, granularity))
+
+    counts = "".join(f",\n           SUM(CASE WHEN event = '{event}' THEN count ELSE 0 END) AS {event}"
+                     for event in events)
+    by_column = f", NULLIF(value, '') AS {by}" if by else ""
+    query = f"""
+    SELECT bucket{by_column}{counts}
+    FROM trend_counts
+    WHERE {' AND '.join(conditions)}
+    GROUP BY bucket, value
+    ORDER BY bucket, value
+    """
+    return read_sql_cached(query, conn, (table,), params)
+
+
+def main():
+    """Rebuild the trend rollups of the platform database."""
+    from app.data.db import connect_database, transaction
+
+    conn = connect_database()
+    with transaction(conn):
+        rebuild_trends(conn.cursor())
+    conn.close()
+    print("✅ Trend rollups rebuilt successfully!")
+
+
+if __name__ == "__main__":
+    main()
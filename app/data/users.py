@@ -1,26 +1,221 @@
-from app.data.db import connect_database
+import hashlib
+import math
+import threading
+from app.data.cache import cached_call, table_versions
+from app.data.db import BULK_BATCH_SIZE, bulk_insert, transaction, use_connection
+from services.provisioning import username_lookups
 
+# Bloom filter sizing: false-positive rate for "username taken?" checks,
+# and the minimum number of names each filter is sized for
+USERNAME_FILTER_ERROR_RATE = 0.01
+USERNAME_FILTER_MIN_CAPACITY = 1024
 
-def get_user_by_username(username):
-    """Retrieve user by username."""
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT * FROM users WHERE username = ?",
-        (username,)
-    )
-    user = cursor.fetchone()
-    conn.close()
-    return user
+# Insert order used by the bulk API
+USER_COLUMNS = ("username", "password_hash", "role")
 
 
-def insert_user(username, password_hash, role='user'):
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of strings.
+
+    `might_contain` never returns False for an added item; it returns True
+    for an absent item with probability about `error_rate` while no more
+    than `capacity` items have been added.
+    """
+
+    def __init__(self, capacity, error_rate=USERNAME_FILTER_ERROR_RATE):
+        self.capacity = capacity
+        self.count = 0
+        self._size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def might_contain(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+    def _positions(self, item):
+        # Double hashing: k positions from two independent 64-bit hashes
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._size for i in range(self._hashes)]
+
+
+class UsernameDirectory:
+    """
+    Per-database Bloom filters of every username, for "is this name free?"
+    checks that do not read the users table.
+
+    A "might exist" answer still has to be confirmed with a lookup. Each
+    filter remembers the users version from table_versions it reflects;
+    writes made through this module advance it, so a filter is only rebuilt
+    when it fills up or another process (or a write outside this module)
+    has changed the users table. The UNIQUE constraint on users.username
+    remains the final check.
+    """
+
+    def __init__(self):
+        self._filters = {}
+        self._lock = threading.Lock()
+
+    def might_exist(self, conn, username):
+        key, version = _users_version(conn)
+        with self._lock:
+            entry = self._filters.get(key)
+            if entry is not None and version is not None and entry[1] == version:
+                return entry[0].might_contain(username)
+
+        bloom = self._load(conn)
+        with self._lock:
+            self._filters[key] = (bloom, version)
+        return bloom.might_contain(username)
+
+    def add(self, conn, usernames, version_before):
+        """
+        Follow a users write made through this module.
+
+        Call inside the write transaction, after the write. `version_before`
+        is the users version read in the same transaction before it; if the
+        filter was built at another version, writes it has not seen came in
+        between and it is dropped for rebuild, as is a full filter.
+        """
+        key, version = _users_version(conn)
+        with self._lock:
+            entry = self._filters.get(key)
+            if entry is None:
+                return
+            bloom, filter_version = entry
+            if filter_version != version_before or bloom.count + len(usernames) > bloom.capacity:
+                del self._filters[key]
+                return
+            for username in usernames:
+                bloom.add(username)
+            self._filters[key] = (bloom, version)
+
+    def clear(self):
+        with self._lock:
+            self._filters.clear()
+
+    @staticmethod
+    def _load(conn):
+        usernames = [row[0] for row in conn.execute("SELECT username FROM users")]
+        bloom = BloomFilter(max(USERNAME_FILTER_MIN_CAPACITY, 2 * len(usernames)))
+        for username in usernames:
+            bloom.add(username)
+        return bloom
+
+
+def _users_version(conn):
+    """
+    Return ((database file, database id), users version) from table_versions.
+
+    The pair identifies the database a filter belongs to; the version is
+    None when table_versions has no users row.
+    """
+    db_file, database_id, versions = table_versions(conn, ["users"])
+    return (db_file, database_id), (versions[0][1] if versions else None)
+
+
+_username_directory = UsernameDirectory()
+
+
+def reset_username_directory():
+    """Drop the username filters, e.g. after users are added outside insert_user."""
+    _username_directory.clear()
+
+
+def get_user_by_username(username, conn=None):
+    """
+    Retrieve user by username.
+
+    Rows are served from the shared query cache until the users table
+    next changes.
+    """
+    with use_connection(conn) as conn:
+        def fetch():
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT * FROM users WHERE username = ?",
+                (username,)
+            )
+            return cursor.fetchone()
+
+        return cached_call(conn, ("get_user_by_username", username), ("users",), fetch)
+
+
+def username_exists(username, conn=None):
+    """
+    Check whether a username is taken.
+
+    Free names - the common case when registering - are answered from the
+    in-memory username filter without reading the users table.
+    """
+    with use_connection(conn) as conn:
+        if not _username_directory.might_exist(conn, username):
+            return False
+        return get_user_by_username(username, conn) is not None
+
+
+def insert_user(username, password_hash, role='user', conn=None):
     """Insert new user."""
-    conn = connect_database()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-        (username, password_hash, role)
-    )
-    conn.commit()
-    conn.close()
+    with use_connection(conn) as conn, transaction(conn):
+        version_before = _users_version(conn)[1]
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+            (username, password_hash, role)
+        )
+        _username_directory.add(conn, [username], version_before)
+
+
+def insert_users_bulk(users, conn=None, batch_size=BULK_BATCH_SIZE):
+    """
+    Insert many users in a single transaction.
+
+    Args:
+        users: Iterable of (username, password_hash, role) tuples
+        conn: Database connection (None to use the shared pool)
+        batch_size: Rows sent to each executemany call
+
+    Returns:
+        range: IDs of the inserted users
+    """
+    users = list(users)
+    with use_connection(conn) as conn, transaction(conn):
+        version_before = _users_version(conn)[1]
+        ids = bulk_insert(conn, "users", USER_COLUMNS, users, batch_size)
+        _username_directory.add(conn, [user[0] for user in users], version_before)
+        return ids
+
+
+def existing_usernames(usernames, conn=None):
+    """Return the subset of `usernames` already present in the users table."""
+    found = set()
+    with use_connection(conn) as conn:
+        for sql, params in username_lookups(usernames):
+            found.update(row[0] for row in conn.execute(sql, params))
+    return found
+
+
+def update_password_hash(username, old_hash, new_hash, conn=None):
+    """
+    Replace a user's password hash, unless it changed since `old_hash` was read.
+
+    Returns:
+        bool: True if the hash was replaced
+    """
+    with use_connection(conn) as conn, transaction(conn):
+        version_before = _users_version(conn)[1]
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE users SET password_hash = ? WHERE username = ? AND password_hash = ?",
+            (new_hash, username, old_hash)
+        )
+        _username_directory.add(conn, [], version_before)
+        return cursor.rowcount > 0
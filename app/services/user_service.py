@@ -1,11 +1,23 @@
-import bcrypt
+import argparse
+import csv
+import re
 import sqlite3
+from collections import Counter
+from itertools import islice
 from pathlib import Path
-from app.data.db import connect_database
-from app.data.users import insert_user
+from app.data.db import BULK_BATCH_SIZE, transaction, use_connection
+from app.data.users import (existing_usernames, get_user_by_username, insert_user,
+                            insert_users_bulk, reset_username_directory,
+                            update_password_hash, username_exists)
+from services.password_hasher import HasherBusyError, get_password_hasher, hash_passwords
+from services.provisioning import (ALREADY_EXISTS, CREATED, INVALID, ProvisionResult,
+                                   classify_records)
 
 DATA = Path("DATA")
 
+# Modular-crypt bcrypt hash: $2b$<cost>$<22-char salt><31-char digest>
+BCRYPT_HASH_PATTERN = re.compile(r"^\$2[abxy]\$\d{2}\$[./A-Za-z0-9]{53}$")
+
 
 def register_user(username, password, role="user"):
     """
@@ -18,99 +30,184 @@ def register_user(username, password, role="user"):
 
     Returns:
         bool: success
-    """
-    conn = connect_database()
-    cursor = conn.cursor()
 
-    # Check if user already exists
-    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-    if cursor.fetchone():
-        conn.close()
+    Raises:
+        HasherBusyError: Too many passwords are already being hashed
+    """
+    # Check if user already exists (free names are answered from memory)
+    if username_exists(username):
         return False # , f"Username '{username}' already exists."
 
-    # Hash the password
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    password_hash = hashed.decode('utf-8')
+    # Hash the password on the hashing pool (without holding a pooled connection)
+    password_hash = get_password_hasher().hash_password(password)
 
-    # Insert new user
-    insert_user(username, password_hash, role)
+    # Insert new user; the UNIQUE constraint catches a name taken meanwhile
+    try:
+        insert_user(username, password_hash, role)
+    except sqlite3.IntegrityError:
+        return False
 
     return True  # , f"User '{username}' registered successfully!"
 
 
+def register_users_bulk(records, role="user", conn=None):
+    """
+    Register many users at once.
+
+    Passwords are hashed in parallel on a process pool, then every new
+    user is inserted with executemany in one transaction.
+
+    Args:
+        records: Iterable of (username, password) or (username, password, role)
+            tuples, or dicts with those keys
+        role: Role for records that do not give one
+        conn: Database connection (None to use the shared pool)
+
+    Returns:
+        list: One ProvisionResult per record, in input order, with status
+            CREATED (detail: new user id), ALREADY_EXISTS or INVALID (detail:
+            the reason)
+    """
+    results, pending = classify_records(records, role)
+
+    with use_connection(conn) as conn:
+        # Skip hashing for names that are already taken
+        for username in existing_usernames(pending, conn):
+            index = pending.pop(username)[0]
+            results[index] = ProvisionResult(username, ALREADY_EXISTS, None)
+
+        names = list(pending)
+        hashes = hash_passwords([pending[name][1] for name in names])
+
+        with transaction(conn):
+            # Re-check under the write lock for names registered meanwhile
+            for username in existing_usernames(names, conn):
+                index = pending.pop(username)[0]
+                results[index] = ProvisionResult(username, ALREADY_EXISTS, None)
+            rows = [(name, password_hash, pending[name][2])
+                    for name, password_hash in zip(names, hashes) if name in pending]
+            ids = insert_users_bulk(rows, conn)
+
+    for (username, _, _), user_id in zip(rows, ids):
+        results[pending[username][0]] = ProvisionResult(username, CREATED, user_id)
+    return results
+
+
 def login_user(username, password):
     """
     Authenticate a user against the database.
 
+    A correct password whose stored hash uses a bcrypt cost other than the
+    calibrated one is rehashed and saved.
+
     Args:
         username: User's login name
         password: Plain text password to verify
 
     Returns:
         bool: success
-    """
-    conn = connect_database()
-    cursor = conn.cursor()
 
-    # Check both username and password_hash
-    cursor.execute(
-        "SELECT username, password_hash FROM users WHERE username = ?", (username,))
-    user = cursor.fetchone()
-    conn.close()
+    Raises:
+        HasherBusyError: Too many logins are already being verified
+    """
+    # Rows are cached until the users table changes
+    user = get_user_by_username(username)
 
     if not user:
         return False  # Username not found
 
-    stored_hash = user[1]
-    password_bytes = password.encode('utf-8')
-    hash_bytes = stored_hash.encode('utf-8')
-
-    if bcrypt.checkpw(password_bytes, hash_bytes):
-        return True
-    else:
+    stored_hash = user[2]
+    hasher = get_password_hasher()
+    if not hasher.check_password(password, stored_hash):
         return False
 
+    # Bring hashes made at an older cost up to the calibrated one; if the
+    # pool is saturated, leave it for a later login rather than fail this one
+    if hasher.needs_rehash(stored_hash):
+        try:
+            update_password_hash(username, stored_hash, hasher.hash_password(password))
+        except HasherBusyError:
+            pass
+    return True
+
 
-def migrate_users_from_file(conn, filepath=DATA / "users.txt"):
+def migrate_users_from_file(conn, filepath=DATA / "users.txt", batch_size=BULK_BATCH_SIZE):
     """
     Migrate users from users.txt to the database.
 
+    Lines are `username,bcrypt_hash[,role]`. The file is streamed and
+    inserted in executemany batches inside one transaction, so memory use
+    stays flat however large the file is and a failure leaves no partial
+    import. Existing usernames are left untouched.
+
     Args:
-        conn: Database connection
+        conn: Database connection (None to use the shared pool)
         filepath: Path to users.txt file
+        batch_size: Rows sent to each executemany call
+
+    Returns:
+        dict: Line counts - migrated, skipped (username already present)
+            and malformed (missing username or not a bcrypt hash)
     """
+    counts = {"migrated": 0, "skipped": 0, "malformed": 0}
     if not filepath.exists():
         print(f"⚠️  File not found: {filepath}")
         print("   No users to migrate.")
-        return
-    conn = connect_database()
-    cursor = conn.cursor()
-    migrated_count = 0
+        return counts
 
-    with open(filepath, 'r') as f:
+    def parse(f):
         for line in f:
             line = line.strip()
             if not line:
                 continue
 
-            # Parse line: username,password_hash
+            # Parse line: username,password_hash[,role]
             parts = line.split(',')
-            if len(parts) >= 2:
-                username = parts[0]
-                password_hash = parts[1]
-
-                # Insert user (ignore if already exists)
-                try:
-                    cursor.execute(
-                        "INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-                        (username, password_hash, 'user')
-                    )
-                    if cursor.rowcount > 0:
-                        migrated_count += 1
-                except sqlite3.Error as e:
-                    print(f"Error migrating user {username}: {e}")
-
-    conn.commit()
-    print(f"✅ Migrated {migrated_count} users from {filepath.name}")
+            if len(parts) in (2, 3) and parts[0] and BCRYPT_HASH_PATTERN.match(parts[1]):
+                yield parts[0], parts[1], parts[2] if len(parts) == 3 and parts[2] else 'user'
+            else:
+                counts["malformed"] += 1
+
+    with use_connection(conn) as conn, open(filepath, 'r', encoding='utf-8') as f:
+        rows = parse(f)
+        with transaction(conn):
+            cursor = conn.cursor()
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                # Insert users (ignore if already exists)
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                    batch
+                )
+                counts["migrated"] += cursor.rowcount
+                counts["skipped"] += len(batch) - cursor.rowcount
+        reset_username_directory()
+
+    print(f"✅ Migrated {counts['migrated']} users from {filepath.name} "
+          f"({counts['skipped']} already present, {counts['malformed']} malformed lines)")
+    return counts
+
+
+def main():
+    """Provision users from a CSV file with username,password[,role] columns."""
+    parser = argparse.ArgumentParser(description="Register many users from a CSV file.")
+    parser.add_argument("csv_file", type=Path, help="CSV with username,password[,role] header")
+    parser.add_argument("--role", default="user", help="Role for rows without one")
+    args = parser.parse_args()
+
+    with open(args.csv_file, newline="") as f:
+        results = register_users_bulk(csv.DictReader(f), role=args.role)
+
+    for result in results:
+        if result.status != CREATED:
+            print(f"   {result.username}: {result.status}"
+                  + (f" ({result.detail})" if result.detail else ""))
+    counts = Counter(result.status for result in results)
+    print(f"✅ Created {counts[CREATED]} users, {counts[ALREADY_EXISTS]} already existed, "
+          f"{counts[INVALID]} invalid")
+
+
+if __name__ == "__main__":
+    main()
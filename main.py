@@ -1,10 +1,17 @@
+import argparse
+import contextlib
+import io
+import tempfile
+import time
 import pandas as pd
 from pathlib import Path
 from app.data.db import connect_database, load_all_csv_data
-from app.data.schema import create_all_tables
+from app.data.schema import create_all_tables, run_migrations
+from app.data.query_plans import find_full_scans
 from app.services.user_service import register_user, login_user, migrate_users_from_file
 from app.data.incidents import (
     insert_incident,
+    insert_incidents_bulk,
     get_all_incidents,
     get_incidents_by_type_count,
     get_high_severity_by_status,
@@ -20,7 +27,7 @@ def setup_database_complete():
     """
     Complete database setup:
     1. Connect to database
-    2. Create all tables
+    2. Apply schema migrations
     3. Migrate users from users.txt
     4. Load CSV data for all domains
     5. Verify setup
@@ -34,14 +41,15 @@ def setup_database_complete():
     conn = connect_database()
     print("       Connected")
 
-    # Step 2: Create tables
-    print("\n[2/5] Creating database tables...")
-    create_all_tables(conn)
+    # Step 2: Create tables / apply pending schema migrations
+    print("\n[2/5] Migrating database schema...")
+    run_migrations(conn)
 
     # Step 3: Migrate users
     print("\n[3/5] Migrating users from users.txt...")
-    user_count = migrate_users_from_file(conn)
-    print(f"       Migrated {user_count} users")
+    user_counts = migrate_users_from_file(conn)
+    print(f"       Migrated {user_counts['migrated']} users, skipped {user_counts['skipped']}, "
+          f"{user_counts['malformed']} malformed lines")
 
     # Step 4: Load CSV data
     print("\n[4/5] Loading CSV data...")
@@ -77,11 +85,13 @@ def run_comprehensive_tests():
 
     # Test 1: Authentication
     print("\n[TEST 1] Authentication")
-    success, msg = register_user("test_user", "TestPass123!", "user")
-    print(f"  Register: {'✅' if success else '❌'} {msg}")
+    registered = register_user("test_user", "TestPass123!", "user")
+    print(f"  Register: ✅ {'Registered' if registered else 'Already registered'}")
 
-    success, msg = login_user("test_user", "TestPass123!")
-    print(f"  Login:    {'✅' if success else '❌'} {msg}")
+    success = login_user("test_user", "TestPass123!")
+    print(f"  Login:    {'✅' if success else '❌'}")
+    if not success:
+        raise AssertionError("test_user could not log in")
 
     # Test 2: CRUD Operations
     print("\n[TEST 2] CRUD Operations")
@@ -123,8 +133,21 @@ def run_comprehensive_tests():
     df_high = get_high_severity_by_status(conn)
     print(f"  High Severity: Found {len(df_high)} status categories")
 
+    # Test 4: Query plans
+    print("\n[TEST 4] Dashboard Query Plans")
+    full_scans = find_full_scans(conn)
+    for name, details in full_scans.items():
+        print(f"  ❌ {name}: {'; '.join(details)}")
+    if full_scans:
+        raise AssertionError(f"{len(full_scans)} dashboard queries scan a full table")
+    print("  ✅ Every dashboard query is index-backed")
+
     conn.close()
 
+    # Test 5: Bulk insert throughput
+    print("\n[TEST 5] Bulk Insert Throughput")
+    run_insert_benchmark()
+
     print("\n" + "="*60)
     print("✅ ALL TESTS PASSED!")
     print("="*60)
@@ -168,6 +191,40 @@ def run_comprehensive_tests():
     conn.close()
 
 
+def run_insert_benchmark(row_count=2000):
+    """
+    Compare rows/sec of insert_incident against insert_incidents_bulk.
+
+    Runs against a throwaway database with every migration applied, so
+    inserts pay for the same indexes and triggers as on the real one,
+    while the real data is untouched. Run it with `python main.py --benchmark`.
+    """
+    rows = [
+        ("2024-11-05", "Phishing", "Low", "Open", f"Benchmark incident {i}", "bench")
+        for i in range(row_count)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = connect_database(Path(tmp_dir) / "benchmark.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_migrations(conn)
+
+        start = time.perf_counter()
+        for row in rows:
+            insert_incident(conn, *row)
+        single_rate = row_count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ids = insert_incidents_bulk(conn, rows)
+        bulk_rate = len(ids) / (time.perf_counter() - start)
+
+        conn.close()
+
+    print(f"  Single-row: {single_rate:,.0f} rows/sec")
+    print(f"  Bulk:       {bulk_rate:,.0f} rows/sec "
+          f"({bulk_rate / single_rate:.1f}x faster)")
+
+
 def main():
     """Main demo function - shows all functionality."""
     print("=" * 60)
@@ -181,11 +238,11 @@ def main():
     migrate_users_from_file(conn)
 
     # 3. Test authentication
-    success, msg = register_user("alice", "SecurePass123!", "analyst")
-    print(msg)
+    registered = register_user("alice", "SecurePass123!", "analyst")
+    print("Registered alice" if registered else "alice is already registered")
 
-    success, msg = login_user("alice", "SecurePass123!")
-    print(msg)
+    success = login_user("alice", "SecurePass123!")
+    print("Logged in as alice" if success else "Login failed for alice")
 
     # 4. Test CRUD
     incident_id = insert_incident(
@@ -203,20 +260,21 @@ def main():
     df = get_all_incidents(conn)
     print(f"Total incidents: {len(df)}")
 
+    conn.close()
+
     # 1. Setup database
     conn = connect_database()
     create_all_tables(conn)
-    conn.close()
 
     # 2. Migrate users
     migrate_users_from_file(conn)
 
     # 3. Test authentication
-    success, msg = register_user("alice", "SecurePass123!", "analyst")
-    print(msg)
+    registered = register_user("alice", "SecurePass123!", "analyst")
+    print("Registered alice" if registered else "alice is already registered")
 
-    success, msg = login_user("alice", "SecurePass123!")
-    print(msg)
+    success = login_user("alice", "SecurePass123!")
+    print("Logged in as alice" if success else "Login failed for alice")
 
     # 4. Test CRUD
     incident_id = insert_incident(
@@ -233,6 +291,7 @@ def main():
     # 5. Query data
     df = get_all_incidents(conn)
     print(f"Total incidents: {len(df)}")
+    conn.close()
 
     setup_database_complete()
 
@@ -240,4 +299,13 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Database demo and checks.")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Only run the insert throughput benchmark")
+    parser.add_argument("--rows", type=int, default=2000,
+                        help="Rows inserted by each benchmark pass")
+    args = parser.parse_args()
+    if args.benchmark:
+        run_insert_benchmark(args.rows)
+    else:
+        main()
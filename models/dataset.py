@@ -1,15 +1,50 @@
+from typing import Optional
+
+BYTES_PER_MB = 1024 * 1024
+
+
 class Dataset:
     """Represents a data science dataset in the platform."""
 
-    def __init__(self, dataset_id: int, name: str, size_bytes: int, rows: int, source: str):
+    # No per-instance __dict__, so large catalogues stay compact
+    __slots__ = ("__id", "__name", "__category", "__source", "__last_updated", "__rows",
+                 "__size_bytes")
+
+    # datasets_metadata columns read by from_row and returned by to_row, in order
+    # (record_count is the row count; file_size_mb is converted to bytes)
+    COLUMNS = ("id", "dataset_name", "category", "source", "last_updated", "record_count",
+               "file_size_mb")
+
+    def __init__(self, dataset_id: int, name: str, size_bytes: int, rows: int, source: str,
+                 category: Optional[str] = None, last_updated: Optional[str] = None):
         self.__id = dataset_id
         self.__name = name
         self.__size_bytes = size_bytes
         self.__rows = rows
         self.__source = source
+        self.__category = category
+        self.__last_updated = last_updated
+
+    @classmethod
+    def from_row(cls, row) -> "Dataset":
+        """Build a dataset from a row holding COLUMNS in order."""
+        dataset_id, name, category, source, last_updated, rows, size_mb = row
+        size_bytes = round(size_mb * BYTES_PER_MB) if size_mb is not None else 0
+        return cls(dataset_id, name, size_bytes, rows, source, category, last_updated)
+
+    @classmethod
+    def row_factory(cls, cursor, row) -> "Dataset":
+        """sqlite3 row factory for queries that SELECT the COLUMNS."""
+        return cls.from_row(row)
+
+    def to_row(self) -> tuple:
+        """Return the dataset as a tuple of COLUMNS values."""
+        # Six decimal places of a MB is byte resolution
+        return (self.__id, self.__name, self.__category, self.__source, self.__last_updated,
+                self.__rows, round(self.calculate_size_mb(), 6))
 
     def calculate_size_mb(self) -> float:
-        return self.__size_bytes / (1024 * 1024)
+        return self.__size_bytes / BYTES_PER_MB
 
     def get_source(self) -> str:
         return self.__source
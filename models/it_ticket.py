@@ -1,12 +1,51 @@
+from typing import Optional
+
+
 class ITTicket:
     """Represents an IT support ticket."""
 
-    def __init__(self, ticket_id: int, title: str, priority: str, status: str, assigned_to: str):
+    # No per-instance __dict__, so large ticket lists stay compact
+    __slots__ = ("__id", "__reference", "__priority", "__status", "__category", "__title",
+                 "__description", "__created_date", "__resolved_date", "__assigned_to")
+
+    # it_tickets columns read by from_row and returned by to_row, in order
+    # (ticket_id is the TKT-... reference; subject is the title)
+    COLUMNS = ("id", "ticket_id", "priority", "status", "category", "subject", "description",
+               "created_date", "resolved_date", "assigned_to")
+
+    def __init__(self, ticket_id: int, title: str, priority: str, status: str, assigned_to: str,
+                 reference: Optional[str] = None, category: Optional[str] = None,
+                 description: Optional[str] = None, created_date: Optional[str] = None,
+                 resolved_date: Optional[str] = None):
         self.__id = ticket_id
         self.__title = title
         self.__priority = priority
         self.__status = status
         self.__assigned_to = assigned_to
+        self.__reference = reference
+        self.__category = category
+        self.__description = description
+        self.__created_date = created_date
+        self.__resolved_date = resolved_date
+
+    @classmethod
+    def from_row(cls, row) -> "ITTicket":
+        """Build a ticket from a row holding COLUMNS in order."""
+        (ticket_id, reference, priority, status, category, title, description,
+         created_date, resolved_date, assigned_to) = row
+        return cls(ticket_id, title, priority, status, assigned_to, reference, category,
+                   description, created_date, resolved_date)
+
+    @classmethod
+    def row_factory(cls, cursor, row) -> "ITTicket":
+        """sqlite3 row factory for queries that SELECT the COLUMNS."""
+        return cls.from_row(row)
+
+    def to_row(self) -> tuple:
+        """Return the ticket as a tuple of COLUMNS values."""
+        return (self.__id, self.__reference, self.__priority, self.__status, self.__category,
+                self.__title, self.__description, self.__created_date, self.__resolved_date,
+                self.__assigned_to)
 
     def assign_to(self, staff: str) -> None:
         self.__assigned_to = staff
@@ -1,12 +1,49 @@
+from typing import Optional
+
+# Integer severity levels for risk scoring (unknown severities score 0)
+SEVERITY_LEVELS = {
+    "low": 1,
+    "medium": 2,
+    "high": 3,
+    "critical": 4,
+}
+
+
 class SecurityIncident:
     """Represents a cybersecurity incident in the platform."""
 
-    def __init__(self, incident_id: int, incident_type: str, severity: str, status: str, description: str):
+    # No per-instance __dict__, so millions of incidents stay compact
+    __slots__ = ("__id", "__date", "__incident_type", "__severity", "__status",
+                 "__description", "__reported_by")
+
+    # cyber_incidents columns read by from_row and returned by to_row, in order
+    COLUMNS = ("id", "date", "incident_type", "severity", "status", "description", "reported_by")
+
+    def __init__(self, incident_id: int, incident_type: str, severity: str, status: str, description: str,
+                 date: Optional[str] = None, reported_by: Optional[str] = None):
         self.__id = incident_id
         self.__incident_type = incident_type
         self.__severity = severity
         self.__status = status
         self.__description = description
+        self.__date = date
+        self.__reported_by = reported_by
+
+    @classmethod
+    def from_row(cls, row) -> "SecurityIncident":
+        """Build an incident from a row holding COLUMNS in order."""
+        incident_id, date, incident_type, severity, status, description, reported_by = row
+        return cls(incident_id, incident_type, severity, status, description, date, reported_by)
+
+    @classmethod
+    def row_factory(cls, cursor, row) -> "SecurityIncident":
+        """sqlite3 row factory for queries that SELECT the COLUMNS."""
+        return cls.from_row(row)
+
+    def to_row(self) -> tuple:
+        """Return the incident as a tuple of COLUMNS values."""
+        return (self.__id, self.__date, self.__incident_type, self.__severity, self.__status,
+                self.__description, self.__reported_by)
 
     def get_id(self) -> int:
         return self.__id
@@ -24,14 +61,8 @@ class SecurityIncident:
         self.__status = new_status
 
     def get_severity_level(self) -> int:
-        """Return an integer severity level (simple example)."""
-        mapping = {
-            "low": 1,
-            "medium": 2,
-            "high": 3,
-            "critical": 4,
-        }
-        return mapping.get(self.__severity.lower(), 0)
+        """Return an integer severity level (see SEVERITY_LEVELS)."""
+        return SEVERITY_LEVELS.get(self.__severity.lower(), 0)
     
     def __str__(self) -> str:
         return f"Incident {self.__id} [{self.__severity.upper()}] {self.__incident_type}"
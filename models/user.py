@@ -1,11 +1,31 @@
 class User:
     """Represents a user in the Multi-Domain Intelligence Platform."""
 
+    __slots__ = ("__username", "__password_hash", "__role")
+
+    # users columns read by from_row and returned by to_row, in order
+    COLUMNS = ("username", "password_hash", "role")
+
     def __init__(self, username: str, password_hash: str, role: str):
         self.__username = username
         self.__password_hash = password_hash
         self.__role = role
 
+    @classmethod
+    def from_row(cls, row) -> "User":
+        """Build a user from a row holding COLUMNS in order."""
+        username, password_hash, role = row
+        return cls(username, password_hash, role)
+
+    @classmethod
+    def row_factory(cls, cursor, row) -> "User":
+        """sqlite3 row factory for queries that SELECT the COLUMNS."""
+        return cls.from_row(row)
+
+    def to_row(self) -> tuple:
+        """Return the user as a tuple of COLUMNS values."""
+        return (self.__username, self.__password_hash, self.__role)
+
     def get_username(self) -> str:
         return self.__username
 
@@ -1,8 +1,9 @@
 from openai import OpenAI
 import streamlit as st
 import time
-from app.data.db import connect_database
+from app.data.db import get_pool
 from app.data.incidents import *
+from services.conversation_memory import ConversationMemory
 
 # Show warning if user is not logged in
 if not st.session_state.logged_in:
@@ -16,34 +17,29 @@ if not st.session_state.logged_in:
 st.set_page_config(page_title="Cyber Incidents Dashboard", layout="wide")
 st.title("Cyber Incidents Dashboard")
 
-conn = connect_database()
-cursor = conn.cursor()
-
 dashboard, chatbot = st.tabs(["Dashboard", "AI Chatbot"])
 
-with dashboard:
+# Reads share one read-only pooled connection for the whole render;
+# writes borrow a read-write handle only when a form is submitted
+with dashboard, get_pool(profile="dashboard-read", read_only=True).connection() as conn:
+    cursor = conn.cursor()
+
     # ---------- READ incident metrics: Total / Open / Critical Incidents ----------
     key1, key2, key3 = st.columns(3)
 
+    kpis = get_incident_kpis(conn)
+
     with key1:
-        cursor.execute("SELECT COUNT(*) FROM cyber_incidents")
-        count = cursor.fetchone()
         st.text("Total incidents")
-        st.header(count[0])
+        st.header(kpis["total"])
 
     with key2:
-        cursor.execute(
-            "SELECT COUNT(*) FROM cyber_incidents WHERE status = 'Open'")
-        open_count = cursor.fetchone()
         st.text("Open incidents")
-        st.header(open_count[0])
+        st.header(kpis["open"])
 
     with key3:
-        cursor.execute(
-            "SELECT COUNT(*) FROM cyber_incidents WHERE severity = 'Critical'")
-        critical_count = cursor.fetchone()
         st.text("Critical severity count")
-        st.header(critical_count[0])
+        st.header(kpis["critical"])
 
     st.divider()
 
@@ -63,9 +59,71 @@ with dashboard:
     st.bar_chart(get_incident_types_with_many_cases(
         conn), x="incident_type", y="count")
 
+    # ---------- Trends: read from the rollup tables ----------
+    st.subheader("Incidents Over Time")
+    t1, t2 = st.columns(2)
+    granularity = t1.selectbox(
+        "Period", ["day", "week", "month"], index=1, key="incident_trend_granularity")
+    trend_by = t2.selectbox(
+        "Break down by", [None, "severity", "incident_type"],
+        format_func=lambda by: "Nothing" if by is None else by.replace("_", " ").title(),
+        key="incident_trend_by")
+    trend = get_incident_trend(conn, granularity, by=trend_by)
+    st.line_chart(trend, x="bucket", y="reported", color=trend_by)
+
+    # ---------- Full-text search ----------
+    st.subheader("Search Incidents")
+    search_text = st.text_input(
+        "Search incident descriptions", placeholder="e.g. phishing email",
+        key="incident_search")
+    if search_text:
+        hits = search_incidents(conn, search_text)
+        if hits.empty:
+            st.info("No matching incidents found.")
+        for hit in hits.itertuples():
+            st.markdown(f"**#{hit.id}** · {hit.date} · {hit.incident_type} · "
+                        f"{hit.severity} · {hit.status}  \n{hit.snippet}")
+
     with st.expander("See the full raw data"):
-        incidents = get_all_incidents(conn)
-        st.dataframe(incidents, width='stretch')
+        # Filters and paging run in SQL; only the visible page is fetched
+        f1, f2, f3, f4 = st.columns(4)
+        filters = {}
+        options = get_incident_filter_options(conn)
+        severity_filter = f1.multiselect(
+            "Severity", options["severity"], key="incident_severity_filter")
+        if severity_filter:
+            filters["severity"] = severity_filter
+        status_filter = f2.multiselect(
+            "Status", options["status"], key="incident_status_filter")
+        if status_filter:
+            filters["status"] = status_filter
+        incident_type_filter = f3.multiselect(
+            "Incident Type", options["incident_type"], key="incident_incident_type_filter")
+        if incident_type_filter:
+            filters["incident_type"] = incident_type_filter
+        date_range = f4.date_input(
+            "Incident date range", value=(), key="incident_date_filter")
+        if len(date_range) == 2:
+            filters["start"], filters["end"] = date_range
+
+        # Restart from the first page whenever the filters change
+        if st.session_state.get("incident_filters") != filters:
+            st.session_state.incident_filters = filters
+            st.session_state.incident_cursors = [None]
+        cursors = st.session_state.incident_cursors
+
+        page = get_incidents_page(conn, filters, cursor=cursors[-1])
+        st.dataframe(page.rows, width='stretch')
+        total = f"{page.total:,}" if page.total_is_exact else f"{page.total:,}+"
+        st.caption(f"Page {len(cursors)} · {total} matching incidents")
+
+        prev_col, next_col = st.columns(2)
+        if prev_col.button("Previous page", disabled=len(cursors) == 1, key="incident_prev"):
+            cursors.pop()
+            st.rerun()
+        if next_col.button("Next page", disabled=page.next_cursor is None, key="incident_next"):
+            cursors.append(page.next_cursor)
+            st.rerun()
 
     st.divider()
 
@@ -74,7 +132,8 @@ with dashboard:
         ["Log New Incident", "Update Status", "Delete Incident"])
 
     # Get the min and max range for ID lookup
-    cursor.execute("SELECT MIN(id), MAX(id) FROM cyber_incidents")
+    cursor.execute(
+        "SELECT (SELECT MIN(id) FROM cyber_incidents), (SELECT MAX(id) FROM cyber_incidents)")
     min_id, max_id = cursor.fetchone()
 
     # ---------- CREATE new incident with a form ----------
@@ -96,8 +155,9 @@ with dashboard:
 
         # When form is submitted
         if i_submitted and date:
-            insert_incident(conn, date, incident_type, severity, status,
-                            description, st.session_state.username)
+            with get_pool().connection() as write_conn:
+                insert_incident(write_conn, date, incident_type, severity, status,
+                                description, st.session_state.username)
             st.success("✓ Incident added successfully!")
             time.sleep(1)
             st.rerun()
@@ -114,7 +174,8 @@ with dashboard:
 
         # When form is submitted
         if u_submitted and incident_id:
-            update_incident_status(conn, incident_id, new_status)
+            with get_pool().connection() as write_conn:
+                update_incident_status(write_conn, incident_id, new_status)
             st.success("✓ Incident updated successfully!")
             time.sleep(1)
             st.rerun()
@@ -131,12 +192,12 @@ with dashboard:
 
         # When form is submitted
         if d_submitted and incident_id_2:
-            rows_affected = delete_incident(conn, incident_id_2)
+            with get_pool().connection() as write_conn:
+                rows_affected = delete_incident(write_conn, incident_id_2)
             st.success(f"✓ {rows_affected} row/s deleted successfully!")
             time.sleep(1)
             st.rerun()
 
-    conn.close()
 
 with chatbot:
     # Initialize OpenAI client
@@ -152,27 +213,21 @@ with chatbot:
     st.subheader("💬 ChatGPT - OpenAI API")
     st.caption("Powered by GPT-4.1 mini")
 
-    # Initialize session state with the system message
-    if 'messages' not in st.session_state:
-        st.session_state.messages = [
-            {"role": "system", "content": SYSTEM_PROMPT}
-        ]
+    # Initialize this page's conversation; requests stay within its token budget
+    if 'cyber_chat' not in st.session_state:
+        st.session_state.cyber_chat = ConversationMemory(SYSTEM_PROMPT)
+    memory = st.session_state.cyber_chat
 
     # Sidebar with controls
     with st.sidebar:
         with st.expander("⚙️ Chat Settings", expanded=False):
 
             # Display message count (excluding system message)
-            message_count = len(
-                [m for m in st.session_state.messages if m["role"] != "system"]
-            )
-            st.metric("Messages", message_count)
+            st.metric("Messages", memory.total_count)
 
             # Clear chat button
             if st.button("🗑️ Clear Chat", use_container_width=True):
-                st.session_state.messages = [
-                    {"role": "system", "content": SYSTEM_PROMPT}
-                ]
+                memory.clear()
                 st.rerun()
 
             # Model selection
@@ -204,10 +259,13 @@ with chatbot:
                 st.switch_page("Home.py")
 
 
-    # Display all previous non-system messages
-    for message in st.session_state.messages:
-        if message["role"] == "system":
-            continue
+    # Older messages are only kept as a summary
+    if memory.evicted_count:
+        with st.expander(f"{memory.evicted_count} earlier messages (summarised)"):
+            st.text(memory.summary)
+
+    # Display the messages still in the window
+    for message in memory.turns():
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
@@ -220,16 +278,13 @@ with chatbot:
             st.markdown(prompt)
 
         # Save user message
-        st.session_state.messages.append({
-            "role": "user",
-            "content": prompt
-        })
+        memory.append("user", prompt)
 
         # Call OpenAI API with streaming
         with st.spinner("Thinking..."):
             completion = client.chat.completions.create(
                 model=model,
-                messages=st.session_state.messages,
+                messages=list(memory.messages()),
                 temperature=temperature,
                 stream=True
             )
@@ -248,7 +303,4 @@ with chatbot:
             container.markdown(full_reply)
 
         # Save assistant response
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": full_reply
-        })
+        memory.append("assistant", full_reply)
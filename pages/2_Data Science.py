@@ -1,8 +1,9 @@
 from openai import OpenAI
 import streamlit as st
 import time
-from app.data.db import connect_database
+from app.data.db import get_pool
 from app.data.datasets import *
+from services.conversation_memory import ConversationMemory
 
 # Show warning if user is not logged in
 if not st.session_state.logged_in:
@@ -16,33 +17,29 @@ if not st.session_state.logged_in:
 st.set_page_config(page_title="Data Science Dashboard", layout="wide")
 st.title("Data Science Dashboard")
 
-conn = connect_database()
-cursor = conn.cursor()
-
 dashboard, chatbot = st.tabs(["Dashboard", "AI Chatbot"])
 
-with dashboard:
+# Reads share one read-only pooled connection for the whole render;
+# writes borrow a read-write handle only when a form is submitted
+with dashboard, get_pool(profile="dashboard-read", read_only=True).connection() as conn:
+    cursor = conn.cursor()
+
     # ---------- READ dataset metrics: Total Datasets / Records / File Size ----------
     key1, key2, key3 = st.columns(3)
 
+    kpis = get_dataset_kpis(conn)
+
     with key1:
-        cursor.execute("SELECT COUNT(*) FROM datasets_metadata")
-        count = cursor.fetchone()
         st.text("Total datasets")
-        st.header(count[0])
+        st.header(kpis["total"])
 
     with key2:
-        cursor.execute(
-            "SELECT SUM(record_count) FROM datasets_metadata")
-        total_record_count = cursor.fetchone()
         st.text("Total Record Count")
-        st.header(f"{total_record_count[0]:,}")
+        st.header(f"{kpis['record_count']:,}")
 
     with key3:
-        cursor.execute("SELECT SUM(file_size_mb) FROM datasets_metadata")
-        total_file_size = cursor.fetchone()
         st.text("Total File Size")
-        st.header(f"{total_file_size[0] / 1024:.2f} GB")
+        st.header(f"{kpis['file_size_mb'] / 1024:.2f} GB")
 
     st.divider()
 
@@ -58,8 +55,41 @@ with dashboard:
         st.bar_chart(get_dataset_by_source(conn), x="source", y="count")
 
     with st.expander("See the full raw data"):
-        datasets = get_all_datasets(conn)
-        st.dataframe(datasets, width='stretch')
+        # Filters and paging run in SQL; only the visible page is fetched
+        f1, f2, f3 = st.columns(3)
+        filters = {}
+        options = get_dataset_filter_options(conn)
+        category_filter = f1.multiselect(
+            "Category", options["category"], key="dataset_category_filter")
+        if category_filter:
+            filters["category"] = category_filter
+        source_filter = f2.multiselect(
+            "Source", options["source"], key="dataset_source_filter")
+        if source_filter:
+            filters["source"] = source_filter
+        date_range = f3.date_input(
+            "Last updated range", value=(), key="dataset_date_filter")
+        if len(date_range) == 2:
+            filters["start"], filters["end"] = date_range
+
+        # Restart from the first page whenever the filters change
+        if st.session_state.get("dataset_filters") != filters:
+            st.session_state.dataset_filters = filters
+            st.session_state.dataset_cursors = [None]
+        cursors = st.session_state.dataset_cursors
+
+        page = get_datasets_page(conn, filters, cursor=cursors[-1])
+        st.dataframe(page.rows, width='stretch')
+        total = f"{page.total:,}" if page.total_is_exact else f"{page.total:,}+"
+        st.caption(f"Page {len(cursors)} · {total} matching datasets")
+
+        prev_col, next_col = st.columns(2)
+        if prev_col.button("Previous page", disabled=len(cursors) == 1, key="dataset_prev"):
+            cursors.pop()
+            st.rerun()
+        if next_col.button("Next page", disabled=page.next_cursor is None, key="dataset_next"):
+            cursors.append(page.next_cursor)
+            st.rerun()
 
     st.divider()
 
@@ -68,7 +98,8 @@ with dashboard:
         ["Log New Dataset", "Update Record Count", "Update Last Updated", "Delete Dataset"])
 
     # Get the min and max range for ID lookup
-    cursor.execute("SELECT MIN(id), MAX(id) FROM datasets_metadata")
+    cursor.execute(
+        "SELECT (SELECT MIN(id) FROM datasets_metadata), (SELECT MAX(id) FROM datasets_metadata)")
     min_id, max_id = cursor.fetchone()
 
     # ---------- CREATE new dataset ----------
@@ -92,7 +123,8 @@ with dashboard:
 
         # When form is submitted
         if i_submitted and dataset_name:
-            insert_dataset(conn, dataset_name, category, source, last_updated, record_count, file_size_mb)
+            with get_pool().connection() as write_conn:
+                insert_dataset(write_conn, dataset_name, category, source, last_updated, record_count, file_size_mb)
             st.success("✓ Dataset added successfully!")
             time.sleep(1)
             st.rerun()
@@ -108,7 +140,8 @@ with dashboard:
 
         # When form is submitted
         if u_submitted and dataset_id:
-            update_dataset_record_count(conn, dataset_id, new_record_count)
+            with get_pool().connection() as write_conn:
+                update_dataset_record_count(write_conn, dataset_id, new_record_count)
             st.success("✓ Dataset updated successfully!")
             time.sleep(1)
             st.rerun()
@@ -123,7 +156,8 @@ with dashboard:
 
         # When form is submitted
         if u2_submitted and dataset_id_2:
-            update_dataset_last_updated(conn, dataset_id_2, new_date)
+            with get_pool().connection() as write_conn:
+                update_dataset_last_updated(write_conn, dataset_id_2, new_date)
             st.success("✓ Dataset updated successfully!")
             time.sleep(1)
             st.rerun()
@@ -139,12 +173,12 @@ with dashboard:
 
         # When form is submitted
         if d_submitted and dataset_id_3:
-            rows_affected = delete_dataset(conn, dataset_id_3)
+            with get_pool().connection() as write_conn:
+                rows_affected = delete_dataset(write_conn, dataset_id_3)
             st.success(f"✓ {rows_affected} row/s deleted successfully!")
             time.sleep(1)
             st.rerun()
 
-    conn.close()
 
 with chatbot:
     # Initialize OpenAI client
@@ -160,27 +194,21 @@ with chatbot:
     st.subheader("💬 ChatGPT - OpenAI API")
     st.caption("Powered by GPT-4.1 mini")
 
-    # Initialize session state with the system message
-    if 'messages' not in st.session_state:
-        st.session_state.messages = [
-            {"role": "system", "content": SYSTEM_PROMPT}
-        ]
+    # Initialize this page's conversation; requests stay within its token budget
+    if 'data_science_chat' not in st.session_state:
+        st.session_state.data_science_chat = ConversationMemory(SYSTEM_PROMPT)
+    memory = st.session_state.data_science_chat
 
     # Sidebar with controls
     with st.sidebar:
         with st.expander("⚙️ Chat Settings", expanded=False):
 
             # Display message count (excluding system message)
-            message_count = len(
-                [m for m in st.session_state.messages if m["role"] != "system"]
-            )
-            st.metric("Messages", message_count)
+            st.metric("Messages", memory.total_count)
 
             # Clear chat button
             if st.button("🗑️ Clear Chat", use_container_width=True):
-                st.session_state.messages = [
-                    {"role": "system", "content": SYSTEM_PROMPT}
-                ]
+                memory.clear()
                 st.rerun()
 
             # Model selection
@@ -212,10 +240,13 @@ with chatbot:
                 st.switch_page("Home.py")
 
 
-    # Display all previous non-system messages
-    for message in st.session_state.messages:
-        if message["role"] == "system":
-            continue
+    # Older messages are only kept as a summary
+    if memory.evicted_count:
+        with st.expander(f"{memory.evicted_count} earlier messages (summarised)"):
+            st.text(memory.summary)
+
+    # Display the messages still in the window
+    for message in memory.turns():
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
@@ -228,16 +259,13 @@ with chatbot:
             st.markdown(prompt)
 
         # Save user message
-        st.session_state.messages.append({
-            "role": "user",
-            "content": prompt
-        })
+        memory.append("user", prompt)
 
         # Call OpenAI API with streaming
         with st.spinner("Thinking..."):
             completion = client.chat.completions.create(
                 model=model,
-                messages=st.session_state.messages,
+                messages=list(memory.messages()),
                 temperature=temperature,
                 stream=True
             )
@@ -256,7 +284,4 @@ with chatbot:
             container.markdown(full_reply)
 
         # Save assistant response
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": full_reply
-        })
+        memory.append("assistant", full_reply)
@@ -1,8 +1,9 @@
 from openai import OpenAI
 import streamlit as st
 import time
-from app.data.db import connect_database
+from app.data.db import get_pool
 from app.data.tickets import *
+from services.conversation_memory import ConversationMemory
 
 # Show warning if user is not logged in
 if not st.session_state.logged_in:
@@ -16,34 +17,29 @@ if not st.session_state.logged_in:
 st.set_page_config(page_title="IT Dashboard", layout="wide")
 st.title("IT Dashboard")
 
-conn = connect_database()
-cursor = conn.cursor()
-
 dashboard, chatbot = st.tabs(["Dashboard", "AI Chatbot"])
 
-with dashboard:
+# Reads share one read-only pooled connection for the whole render;
+# writes borrow a read-write handle only when a form is submitted
+with dashboard, get_pool(profile="dashboard-read", read_only=True).connection() as conn:
+    cursor = conn.cursor()
+
     # ---------- READ tickets metrics: Total / Critical / Open Tickets ----------
     key1, key2, key3 = st.columns(3)
 
+    kpis = get_ticket_kpis(conn)
+
     with key1:
-        cursor.execute("SELECT COUNT(*) FROM it_tickets")
-        count = cursor.fetchone()
         st.text("Total tickets")
-        st.header(count[0])
+        st.header(kpis["total"])
 
     with key2:
-        cursor.execute(
-            "SELECT COUNT(*) FROM it_tickets WHERE priority = 'Critical'")
-        critical_count = cursor.fetchone()
         st.text("Total Critical Tickets")
-        st.header(critical_count[0])
+        st.header(kpis["critical"])
 
     with key3:
-        cursor.execute(
-            "SELECT COUNT(*) FROM it_tickets WHERE status = 'Open'")
-        open_count = cursor.fetchone()
         st.text("Open Tickets")
-        st.header(open_count[0])
+        st.header(kpis["open"])
 
     st.divider()
 
@@ -61,9 +57,92 @@ with dashboard:
     st.subheader("Tickets Categories")
     st.bar_chart(get_tickets_by_category(conn), x="category", y="count")
 
+    # ---------- Trends: read from the rollup tables ----------
+    st.subheader("Tickets Opened vs Resolved")
+    t1, t2 = st.columns(2)
+    granularity = t1.selectbox(
+        "Period", ["day", "week", "month"], index=1, key="ticket_trend_granularity")
+    trend_by = t2.selectbox(
+        "Break down opened tickets by", [None, "priority", "category"],
+        format_func=lambda by: "Nothing" if by is None else by.title(),
+        key="ticket_trend_by")
+    trend = get_ticket_trend(conn, granularity, by=trend_by)
+    if trend_by is None:
+        st.line_chart(trend, x="bucket", y=["opened", "resolved"])
+    else:
+        st.line_chart(trend, x="bucket", y="opened", color=trend_by)
+
+    # ---------- Resolution times: read from the resolution histogram ----------
+    st.subheader("Time To Resolve")
+    overall = get_resolution_stats(conn)
+    m1, m2, m3, m4 = st.columns(4)
+    if not overall.empty:
+        m1.metric("Mean days to resolve", f"{overall['mean_days'][0]:.1f}")
+        m2.metric("Median days", f"{overall['median_days'][0]:.0f}")
+        m3.metric("90th percentile days", f"{overall['p90_days'][0]:.0f}")
+        m4.metric("Resolved within SLA", f"{overall['within_sla'][0]:.0%}")
+    resolution_by = st.selectbox(
+        "Break down by", ["priority", "category", "assigned_to"],
+        format_func=lambda by: by.replace("_", " ").title(), key="resolution_by")
+    st.dataframe(get_resolution_stats(conn, by=resolution_by), hide_index=True, width='stretch')
+
+    # ---------- Full-text search ----------
+    st.subheader("Search Tickets")
+    search_text = st.text_input(
+        "Search ticket subjects and descriptions", placeholder="e.g. vpn timeout",
+        key="ticket_search")
+    if search_text:
+        hits = search_tickets(conn, search_text)
+        if hits.empty:
+            st.info("No matching tickets found.")
+        for hit in hits.itertuples():
+            st.markdown(f"**{hit.ticket_id}** · {hit.priority} · {hit.status} · {hit.subject}"
+                        f"  \n{hit.snippet}")
+
     with st.expander("See the full raw data"):
-        tickets = get_all_tickets(conn)
-        st.dataframe(tickets, width='stretch')
+        # Filters and paging run in SQL; only the visible page is fetched
+        f1, f2, f3, f4, f5 = st.columns(5)
+        filters = {}
+        options = get_ticket_filter_options(conn)
+        priority_filter = f1.multiselect(
+            "Priority", options["priority"], key="ticket_priority_filter")
+        if priority_filter:
+            filters["priority"] = priority_filter
+        status_filter = f2.multiselect(
+            "Status", options["status"], key="ticket_status_filter")
+        if status_filter:
+            filters["status"] = status_filter
+        category_filter = f3.multiselect(
+            "Category", options["category"], key="ticket_category_filter")
+        if category_filter:
+            filters["category"] = category_filter
+        assigned_to_filter = f4.text_input(
+            "Assigned to", key="ticket_assigned_to_filter")
+        if assigned_to_filter:
+            filters["assigned_to"] = assigned_to_filter
+        date_range = f5.date_input(
+            "Created date range", value=(), key="ticket_date_filter")
+        if len(date_range) == 2:
+            filters["start"], filters["end"] = date_range
+
+        # Restart from the first page whenever the filters change
+        if st.session_state.get("ticket_filters") != filters:
+            st.session_state.ticket_filters = filters
+            st.session_state.ticket_cursors = [None]
+        cursors = st.session_state.ticket_cursors
+
+        page = get_tickets_page(conn, filters, cursor=cursors[-1])
+        st.dataframe(page.rows, width='stretch')
+        total = f"{page.total:,}" if page.total_is_exact else f"{page.total:,}+"
+        st.caption(f"Page {len(cursors)} · {total} matching tickets")
+
+        prev_col, next_col = st.columns(2)
+        if prev_col.button("Previous page", disabled=len(cursors) == 1, key="ticket_prev"):
+            cursors.pop()
+            st.rerun()
+        if next_col.button("Next page", disabled=page.next_cursor is None, key="ticket_next"):
+            cursors.append(page.next_cursor)
+            st.rerun()
 
     st.divider()
 
@@ -73,7 +152,8 @@ with dashboard:
 
 
     # Get the min and max range for ID lookup
-    cursor.execute("SELECT MIN(id), MAX(id) FROM it_tickets")
+    cursor.execute(
+        "SELECT (SELECT MIN(id) FROM it_tickets), (SELECT MAX(id) FROM it_tickets)")
     min_id, max_id = cursor.fetchone()
 
     # ---------- CREATE new ticket ----------
@@ -95,8 +175,9 @@ with dashboard:
 
         # When form is submitted
         if i_submitted and priority:
-            insert_ticket(conn, f"TKT-{max_id + 1001}", priority,
-                        status, category, subject, description, created_date)
+            with get_pool().connection() as write_conn:
+                insert_ticket(write_conn, f"TKT-{max_id + 1001}", priority,
+                            status, category, subject, description, created_date)
             st.success("✓ Ticket added successfully!")
             time.sleep(1)
             st.rerun()
@@ -113,7 +194,8 @@ with dashboard:
 
         # When form is submitted
         if u_submitted and ticket_id:
-            update_ticket_status(conn, ticket_id, new_status)
+            with get_pool().connection() as write_conn:
+                update_ticket_status(write_conn, ticket_id, new_status)
             st.success("✓ Ticket updated successfully!")
             time.sleep(1)
             st.rerun()
@@ -128,7 +210,8 @@ with dashboard:
 
         # When form is submitted
         if u2_submitted and ticket_id_2:
-            update_ticket_assignment(conn, ticket_id_2, assigned_to)
+            with get_pool().connection() as write_conn:
+                update_ticket_assignment(write_conn, ticket_id_2, assigned_to)
             st.success("✓ Ticket updated successfully!")
             time.sleep(1)
             st.rerun()
@@ -143,7 +226,8 @@ with dashboard:
 
         # When form is submitted
         if u3_submitted and ticket_id_3:
-            update_ticket_assignment(conn, ticket_id_3, resolved_date)
+            with get_pool().connection() as write_conn:
+                resolve_ticket(write_conn, ticket_id_3, resolved_date)
             st.success("✓ Ticket updated successfully!")
             time.sleep(1)
             st.rerun()
@@ -159,12 +243,12 @@ with dashboard:
 
         # When form is submitted
         if d_submitted and ticket_id_4:
-            rows_affected = delete_ticket(conn, ticket_id)
+            with get_pool().connection() as write_conn:
+                rows_affected = delete_ticket(write_conn, ticket_id)
             st.success(f"✓ {rows_affected} row/s deleted successfully!")
             time.sleep(1)
             st.rerun()
 
-    conn.close()
 
 with chatbot:
     # Initialize OpenAI client
@@ -180,27 +264,21 @@ with chatbot:
     st.subheader("💬 ChatGPT - OpenAI API")
     st.caption("Powered by GPT-4.1 mini")
 
-    # Initialize session state with the system message
-    if 'messages' not in st.session_state:
-        st.session_state.messages = [
-            {"role": "system", "content": SYSTEM_PROMPT}
-        ]
+    # Initialize this page's conversation; requests stay within its token budget
+    if 'it_chat' not in st.session_state:
+        st.session_state.it_chat = ConversationMemory(SYSTEM_PROMPT)
+    memory = st.session_state.it_chat
 
     # Sidebar with controls
     with st.sidebar:
         with st.expander("⚙️ Chat Settings", expanded=False):
 
             # Display message count (excluding system message)
-            message_count = len(
-                [m for m in st.session_state.messages if m["role"] != "system"]
-            )
-            st.metric("Messages", message_count)
+            st.metric("Messages", memory.total_count)
 
             # Clear chat button
             if st.button("🗑️ Clear Chat", use_container_width=True):
-                st.session_state.messages = [
-                    {"role": "system", "content": SYSTEM_PROMPT}
-                ]
+                memory.clear()
                 st.rerun()
 
             # Model selection
@@ -232,10 +310,13 @@ with chatbot:
                 st.switch_page("Home.py")
 
 
-    # Display all previous non-system messages
-    for message in st.session_state.messages:
-        if message["role"] == "system":
-            continue
+    # Older messages are only kept as a summary
+    if memory.evicted_count:
+        with st.expander(f"{memory.evicted_count} earlier messages (summarised)"):
+            st.text(memory.summary)
+
+    # Display the messages still in the window
+    for message in memory.turns():
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
@@ -248,16 +329,13 @@ with chatbot:
             st.markdown(prompt)
 
         # Save user message
-        st.session_state.messages.append({
-            "role": "user",
-            "content": prompt
-        })
+        memory.append("user", prompt)
 
         # Call OpenAI API with streaming
         with st.spinner("Thinking..."):
             completion = client.chat.completions.create(
                 model=model,
-                messages=st.session_state.messages,
+                messages=list(memory.messages()),
                 temperature=temperature,
                 stream=True
             )
@@ -276,7 +354,4 @@ with chatbot:
             container.markdown(full_reply)
 
         # Save assistant response
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": full_reply
-        })
+        memory.append("assistant", full_reply)
@@ -1,40 +1,45 @@
-from typing import List, Dict
+from typing import Dict, Sequence
+from services.conversation_memory import DEFAULT_TOKEN_BUDGET, ConversationMemory
 
 
 class AIAssistant:
     """
     Simple wrapper around an AI/chat model.
     In your real project, connect this to OpenAI or another provider.
+
+    History is kept in a ConversationMemory, so each request stays within
+    `token_budget` however long the conversation runs.
     """
 
-    def __init__(self, system_prompt: str = "You are a helpful assistant."):
-        self._system_prompt = system_prompt
-        self._history: List[Dict[str, str]] = []
+    def __init__(self, system_prompt: str = "You are a helpful assistant.",
+                 token_budget: int = DEFAULT_TOKEN_BUDGET):
+        self._memory = ConversationMemory(system_prompt, token_budget)
 
     def set_system_prompt(self, prompt: str):
         """Set the system prompt for the AI assistant."""
-        self._system_prompt = prompt
+        self._memory.set_system_prompt(prompt)
 
     def get_system_prompt(self) -> str:
-        return self._system_prompt
+        return self._memory.system_prompt
 
     def send_message(self, user_message: str) -> str:
         """
         Send a message and get a response.
-        Replace this body with your real API call to OpenAI.
+        Replace this body with your real API call to OpenAI,
+        sending self._memory.messages() as the messages.
         """
-        self._history.append({"role": "user", "content": user_message})
+        self._memory.append("user", user_message)
 
         # Fake response for now:
         response = f"[AI reply to]: {user_message[:50]}"
-        self._history.append({"role": "assistant", "content": response})
+        self._memory.append("assistant", response)
 
         return response
 
-    def get_history(self) -> List[Dict[str, str]]:
-        """Get the conversation history."""
-        return self._history.copy()
+    def get_history(self) -> Sequence[Dict[str, str]]:
+        """Get the recent conversation history (a read-only live view)."""
+        return self._memory.turns()
 
     def clear_history(self):
         """Clear the conversation history."""
-        self._history.clear()
+        self._memory.clear()
@@ -1,19 +1,32 @@
-from typing import Optional
+import sqlite3
+from collections.abc import Mapping
+from typing import Iterable, List, Optional
 from models.user import User
-import bcrypt
+from services.password_hasher import (HasherBusyError, PasswordHasher, get_password_hasher,
+                                      hash_passwords)
+from services.provisioning import (ALREADY_EXISTS, CREATED, ProvisionResult, classify_records,
+                                   username_lookups)
 
 
 class AuthManager:
-    """Handles user registration and login with bcrypt password hashing."""
+    """
+    Handles user registration and login with bcrypt password hashing.
 
-    def __init__(self, db):
+    Holds no per-user state, so one instance over a shared DatabaseManager
+    can serve every session and thread.
+    """
+
+    def __init__(self, db, hasher: Optional[PasswordHasher] = None):
         """
         Initialize AuthManager with a DatabaseManager instance.
         
         Args:
             db: DatabaseManager instance
+            hasher: PasswordHasher running bcrypt off the calling thread
+                (default: the shared process-wide hasher)
         """
         self._db = db
+        self._hasher = hasher or get_password_hasher()
 
     def register_user(self, username: str, password: str, role: str = "user") -> bool:
         """
@@ -36,23 +49,63 @@ class AuthManager:
         if existing is not None:
             return False
 
-        # Hash the password with bcrypt
-        password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password_bytes, salt)
-        password_hash = hashed.decode('utf-8')
+        # Hash the password with bcrypt on the hashing pool
+        password_hash = self._hasher.hash_password(password)
 
-        # Insert new user
-        self._db.execute_query(
-            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-            (username, password_hash, role),
-        )
+        # Insert new user; the UNIQUE constraint catches a name taken meanwhile
+        try:
+            self._db.execute_query(
+                "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                (username, password_hash, role),
+            )
+        except sqlite3.IntegrityError:
+            return False
         return True
 
+    def register_users_bulk(self, records: Iterable, role: str = "user") -> List[ProvisionResult]:
+        """
+        Register many users with parallel hashing and a single transaction.
+
+        Args:
+            records: (username, password[, role]) tuples or dicts with those keys
+            role: Role for records that do not give one
+
+        Returns:
+            list: One ProvisionResult per record, in input order
+        """
+        results, pending = classify_records(records, role)
+
+        # Skip hashing for names that are already taken
+        for username in self._existing_usernames(pending):
+            results[pending.pop(username)[0]] = ProvisionResult(username, ALREADY_EXISTS, None)
+
+        names = list(pending)
+        hashes = hash_passwords([pending[name][1] for name in names], rounds=self._hasher.rounds)
+
+        with self._db.transaction():
+            # Re-check under the write lock for names registered meanwhile
+            for username in self._existing_usernames(names):
+                results[pending.pop(username)[0]] = ProvisionResult(username, ALREADY_EXISTS, None)
+            # The write lock is held, so the new ids are contiguous
+            first_id = self._last_user_id() + 1
+            self._db.execute_many(
+                "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+                ((name, password_hash, pending[name][2])
+                 for name, password_hash in zip(names, hashes) if name in pending),
+            )
+
+        # pending keeps the insertion order of the rows above
+        for user_id, (username, (index, _, _)) in enumerate(pending.items(), first_id):
+            results[index] = ProvisionResult(username, CREATED, user_id)
+        return results
+
     def login_user(self, username: str, password: str) -> Optional[User]:
         """
         Authenticate a user with bcrypt password verification.
 
+        Hashes made at a bcrypt cost other than the calibrated one are
+        rehashed and saved on successful login.
+
         Args:
             username: Username to authenticate
             password: Plain text password to verify
@@ -61,19 +114,48 @@ class AuthManager:
             User instance if successful, None otherwise
         """
         row = self._db.fetch_one(
-            "SELECT username, password_hash, role FROM users WHERE username = ?",
+            f"SELECT {', '.join(User.COLUMNS)} FROM users WHERE username = ?",
             (username,),
         )
 
         if row is None:
             return None
 
-        username_db, password_hash_db, role_db = row
+        user = User.from_row(_row_values(row, User.COLUMNS))
+        username_db, password_hash_db, role_db = user.to_row()
 
-        # Verify password with bcrypt
-        password_bytes = password.encode('utf-8')
-        hash_bytes = password_hash_db.encode('utf-8')
+        # Verify password with bcrypt on the hashing pool
+        if not user.verify_password(password, self._hasher):
+            return None
 
-        if bcrypt.checkpw(password_bytes, hash_bytes):
-            return User(username_db, password_hash_db, role_db)
-        return None
\ No newline at end of file
+        # Bring hashes made at an older cost up to the calibrated one; if the
+        # pool is saturated, leave it for a later login rather than fail this one
+        if self._hasher.needs_rehash(password_hash_db):
+            try:
+                new_hash = self._hasher.hash_password(password)
+            except HasherBusyError:
+                return user
+            self._db.execute_query(
+                "UPDATE users SET password_hash = ? WHERE username = ? AND password_hash = ?",
+                (new_hash, username_db, password_hash_db),
+            )
+            user = User(username_db, new_hash, role_db)
+        return user
+
+    def _existing_usernames(self, usernames: Iterable[str]) -> set:
+        found = set()
+        for sql, params in username_lookups(usernames):
+            found.update(_row_values(row, ("username",))[0]
+                         for row in self._db.iter_rows(sql, params))
+        return found
+
+    def _last_user_id(self) -> int:
+        row = self._db.fetch_one("SELECT seq FROM sqlite_sequence WHERE name = 'users'")
+        return _row_values(row, ("seq",))[0] if row is not None else 0
+
+
+def _row_values(row, columns) -> tuple:
+    """Values of `columns` from a row made by any DatabaseManager row factory."""
+    if isinstance(row, Mapping):
+        return tuple(row[column] for column in columns)
+    return tuple(row)
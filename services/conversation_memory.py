@@ -0,0 +1,193 @@
+from collections import deque
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterator, Optional
+
+# Prompt tokens a conversation may use, system prompt and summary included
+DEFAULT_TOKEN_BUDGET = 4000
+
+# Share of the budget the rolling summary of evicted turns may take
+DEFAULT_SUMMARY_TOKENS = 500
+
+# Rough token estimate for English chat text (about 4 characters per token),
+# plus the per-message framing chat APIs add
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Characters of each evicted message kept by the default summariser
+SUMMARY_CLIP_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the prompt tokens one message with `text` costs."""
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def clip_summary(summary: str, message: Dict[str, str], max_tokens: int) -> str:
+    """
+    Default summariser: add a clipped line for `message`, dropping the oldest
+    lines once the summary exceeds `max_tokens`.
+
+    Cheap and deterministic; pass a model-backed summariser to
+    ConversationMemory for abstractive summaries.
+    """
+    content = " ".join(message["content"].split())
+    if len(content) > SUMMARY_CLIP_CHARS:
+        content = content[:SUMMARY_CLIP_CHARS - 1] + "…"
+    lines = summary.splitlines() if summary else []
+    lines.append(f"{message['role']}: {content}")
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    while len(lines) > 1 and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class MessagesView(Sequence):
+    """
+    Read-only, live view of a conversation's messages.
+
+    Nothing is copied: the view reads the memory's own message dicts, which
+    callers must not modify, and reflects later appends.
+    """
+
+    __slots__ = ("_memory", "_include_prompt")
+
+    def __init__(self, memory: "ConversationMemory", include_prompt: bool):
+        self._memory = memory
+        self._include_prompt = include_prompt
+
+    def _head(self) -> tuple:
+        return self._memory._prompt_messages() if self._include_prompt else ()
+
+    def __len__(self) -> int:
+        return len(self._head()) + len(self._memory._turns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        head = self._head()
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        if index < len(head):
+            return head[index]
+        return self._memory._turns[index - len(head)]
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        yield from self._head()
+        yield from self._memory._turns
+
+
+class ConversationMemory:
+    """
+    Chat history kept within a prompt-token budget.
+
+    Turns live in a deque, so appending and evicting are O(1). When the
+    system prompt, summary and turns together exceed `token_budget`, the
+    oldest turns are evicted and folded into a rolling summary that is sent
+    as a second system message, so the model keeps the gist of the whole
+    conversation while each request stays bounded. The latest turn is never
+    evicted.
+    """
+
+    def __init__(self, system_prompt: str = "You are a helpful assistant.",
+                 token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 summary_tokens: int = DEFAULT_SUMMARY_TOKENS,
+                 summarizer: Optional[Callable[[str, Dict[str, str], int], str]] = None):
+        """
+        Args:
+            system_prompt: Instructions sent first with every request
+            token_budget: Estimated prompt tokens allowed per request
+            summary_tokens: Estimated tokens the rolling summary may use
+            summarizer: Called as summarizer(summary, evicted_message,
+                summary_tokens) to fold an evicted turn into the summary
+                (default: clip_summary)
+        """
+        self._token_budget = token_budget
+        self._summary_tokens = summary_tokens
+        self._summarizer = summarizer or clip_summary
+        self._turns: deque = deque()
+        self._turn_tokens: deque = deque()
+        self._tokens = 0
+        self._evicted = 0
+        self._summary = ""
+        self._summary_message: Optional[Dict[str, str]] = None
+        self.set_system_prompt(system_prompt)
+
+    # ---------- Writing ----------
+
+    def append(self, role: str, content: str) -> None:
+        """Add a turn, evicting the oldest ones if the budget is exceeded."""
+        tokens = estimate_tokens(content)
+        self._turns.append({"role": role, "content": content})
+        self._turn_tokens.append(tokens)
+        self._tokens += tokens
+        self._evict()
+
+    def set_system_prompt(self, prompt: str) -> None:
+        self._system_message = {"role": "system", "content": prompt}
+        self._system_tokens = estimate_tokens(prompt)
+        self._evict()
+
+    def clear(self) -> None:
+        """Forget every turn and the summary; the system prompt is kept."""
+        self._turns.clear()
+        self._turn_tokens.clear()
+        self._tokens = 0
+        self._evicted = 0
+        self._summary = ""
+        self._summary_message = None
+
+    # ---------- Reading ----------
+
+    def messages(self) -> MessagesView:
+        """System prompt, summary (if any) and recent turns, ready to send."""
+        return MessagesView(self, include_prompt=True)
+
+    def turns(self) -> MessagesView:
+        """The user and assistant turns still inside the window."""
+        return MessagesView(self, include_prompt=False)
+
+    @property
+    def system_prompt(self) -> str:
+        return self._system_message["content"]
+
+    @property
+    def summary(self) -> str:
+        """Rolling summary of evicted turns ('' until something is evicted)."""
+        return self._summary
+
+    @property
+    def evicted_count(self) -> int:
+        """Turns folded into the summary so far."""
+        return self._evicted
+
+    @property
+    def total_count(self) -> int:
+        """Turns added since the last clear, evicted ones included."""
+        return self._evicted + len(self._turns)
+
+    def token_count(self) -> int:
+        """Estimated prompt tokens of messages()."""
+        summary_tokens = estimate_tokens(self._summary) if self._summary else 0
+        return self._system_tokens + summary_tokens + self._tokens
+
+    # ---------- Internals ----------
+
+    def _prompt_messages(self) -> tuple:
+        if self._summary_message is None:
+            return (self._system_message,)
+        return (self._system_message, self._summary_message)
+
+    def _evict(self) -> None:
+        if self.token_count() <= self._token_budget or len(self._turns) <= 1:
+            return
+        while self.token_count() > self._token_budget and len(self._turns) > 1:
+            self._tokens -= self._turn_tokens.popleft()
+            self._summary = self._summarizer(self._summary, self._turns.popleft(),
+                                             self._summary_tokens)
+            self._evicted += 1
+        self._summary_message = {
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{self._summary}",
+        }
@@ -1,46 +1,250 @@
+import queue
 import sqlite3
-from typing import Any, Iterable
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional
+from urllib.parse import quote
+
+# Compiled statements kept per connection (sqlite3's own default is 128)
+DEFAULT_CACHED_STATEMENTS = 128
+
+# Rows fetched per round trip by iter_rows
+DEFAULT_FETCH_SIZE = 1000
+
+# Read-only connections allowed to run queries at the same time
+DEFAULT_MAX_READERS = 4
+
+# Seconds to wait for a lock held by another process
+DEFAULT_BUSY_TIMEOUT = 10.0
+
+
+def dict_row_factory(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    """Row factory returning each row as a {column: value} dict."""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
 
 
 class DatabaseManager:
-    """Handles SQLite database connections and queries."""
+    """
+    Handles SQLite database connections and queries.
+
+    One manager can be shared by every thread in the process. Writes go
+    through a single writer connection guarded by a lock, so they are
+    serialised the way SQLite serialises them anyway. Reads run on a pool
+    of up to `max_readers` read-only connections; with the database in WAL
+    mode they proceed in parallel and never wait for the writer. A thread
+    inside transaction() reads through the writer so it sees its own
+    uncommitted changes.
+    """
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str,
+                 cached_statements: int = DEFAULT_CACHED_STATEMENTS,
+                 row_factory: Optional[Callable] = None,
+                 max_readers: int = DEFAULT_MAX_READERS,
+                 timeout: float = DEFAULT_BUSY_TIMEOUT):
+        """
+        Args:
+            db_path: SQLite database file
+            cached_statements: Prepared statements cached by each connection;
+                raise it for services that cycle through many distinct queries
+            row_factory: Row factory for results, e.g. sqlite3.Row or
+                dict_row_factory (default: plain tuples)
+            max_readers: Reads allowed to run at once; further readers wait
+            timeout: Seconds a connection waits for a lock held by another
+                process before raising
+        """
         self._db_path = db_path
-        self._connection: sqlite3.Connection | None = None
+        self._cached_statements = cached_statements
+        self._row_factory = row_factory
+        self._timeout = timeout
+        # A private in-memory database cannot be opened twice
+        self._writer_only = str(db_path) == ":memory:"
+
+        self._writer: sqlite3.Connection | None = None
+        self._write_lock = threading.RLock()
+        self._transaction_depth = 0
+        self._transaction_owner: Optional[int] = None
+
+        self._readers: queue.LifoQueue = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(max_readers)
+        self._generation = 0
 
     def connect(self) -> None:
-        """Establish database connection."""
-        if self._connection is None:
-            self._connection = sqlite3.connect(self._db_path)
+        """Establish the writer connection (readers are opened on demand)."""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._open(read_only=False)
+                if not self._writer_only:
+                    self._writer.execute("PRAGMA journal_mode=WAL")
 
     def close(self) -> None:
-        """Close database connection."""
-        if self._connection is not None:
-            self._connection.close()
-            self._connection = None
+        """
+        Close every connection.
+
+        Idle readers close immediately and readers still in use close when
+        their query finishes. The manager reconnects if used again.
+        """
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._generation += 1
+        while True:
+            try:
+                reader, _ = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            reader.close()
+
+    @property
+    def row_factory(self) -> Optional[Callable]:
+        return self._row_factory
+
+    @row_factory.setter
+    def row_factory(self, factory: Optional[Callable]) -> None:
+        """Change the row factory used for subsequent queries."""
+        with self._write_lock:
+            self._row_factory = factory
+            if self._writer is not None:
+                self._writer.row_factory = factory
+            # Idle readers are dropped and reopened with the new factory
+            self._generation += 1
+
+    @contextmanager
+    def transaction(self) -> Iterator["DatabaseManager"]:
+        """
+        Group writes into one transaction.
+
+        execute_query and execute_many calls inside the block do not commit
+        individually; the block commits once on success and rolls back if
+        it raises. Nested blocks join the outermost transaction. Other
+        threads' writes wait until the block ends.
+        """
+        with self._write_lock:
+            self.connect()
+            if self._transaction_depth == 0:
+                self._writer.execute("BEGIN IMMEDIATE")
+                self._transaction_owner = threading.get_ident()
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._end_transaction(commit=False)
+                raise
+            self._end_transaction(commit=True)
 
     def execute_query(self, sql: str, params: Iterable[Any] = ()):
         """Execute a write query (INSERT, UPDATE, DELETE)."""
-        if self._connection is None:
+        with self._write_lock:
             self.connect()
-        cur = self._connection.cursor()
-        cur.execute(sql, tuple(params))
-        self._connection.commit()
-        return cur
+            cur = self._writer.cursor()
+            cur.execute(sql, tuple(params))
+            self._commit_unless_in_transaction()
+            return cur
+
+    def execute_many(self, sql: str, rows: Iterable[Iterable[Any]]) -> int:
+        """
+        Execute one write statement for every parameter row.
+
+        `rows` may be a generator; it is consumed lazily by executemany.
+
+        Returns:
+            int: Number of rows changed
+        """
+        with self._write_lock:
+            self.connect()
+            cur = self._writer.cursor()
+            cur.executemany(sql, (tuple(row) for row in rows))
+            self._commit_unless_in_transaction()
+            return cur.rowcount
 
     def fetch_one(self, sql: str, params: Iterable[Any] = ()):
         """Fetch a single row from the database."""
-        if self._connection is None:
-            self.connect()
-        cur = self._connection.cursor()
-        cur.execute(sql, tuple(params))
-        return cur.fetchone()
+        with self._reading() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            return cur.fetchone()
 
     def fetch_all(self, sql: str, params: Iterable[Any] = ()):
         """Fetch all rows from the database."""
-        if self._connection is None:
+        with self._reading() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            return cur.fetchall()
+
+    def iter_rows(self, sql: str, params: Iterable[Any] = (),
+                  batch_size: int = DEFAULT_FETCH_SIZE) -> Iterator[Any]:
+        """
+        Yield the rows of a query without materialising the whole result.
+
+        Rows are fetched `batch_size` at a time, so memory stays bounded for
+        exports of any size. A reader connection is held until the generator
+        is exhausted or closed.
+        """
+        with self._reading() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, tuple(params))
+            try:
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                cur.close()
+
+    @contextmanager
+    def _reading(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection (or the writer, see class docstring)."""
+        if self._writer_only or self._transaction_owner == threading.get_ident():
+            with self._write_lock:
+                self.connect()
+                yield self._writer
+            return
+
+        # Readers never take the write lock, or they would queue behind an
+        # open transaction; it is only needed once, to create the database
+        # file (and switch it to WAL) before the first read-only open
+        if self._writer is None:
             self.connect()
-        cur = self._connection.cursor()
-        cur.execute(sql, tuple(params))
-        return cur.fetchall()
+        self._reader_slots.acquire()
+        try:
+            try:
+                reader, generation = self._readers.get_nowait()
+                if generation != self._generation:
+                    reader.close()
+                    raise queue.Empty
+            except queue.Empty:
+                reader, generation = self._open(read_only=True), self._generation
+            try:
+                yield reader
+            finally:
+                if generation == self._generation:
+                    self._readers.put((reader, generation))
+                else:
+                    reader.close()
+        finally:
+            self._reader_slots.release()
+
+    def _open(self, read_only: bool) -> sqlite3.Connection:
+        if read_only:
+            target, uri = f"file:{quote(str(self._db_path))}?mode=ro", True
+        else:
+            target, uri = self._db_path, False
+        conn = sqlite3.connect(target, uri=uri, timeout=self._timeout,
+                               check_same_thread=False,
+                               cached_statements=self._cached_statements)
+        conn.row_factory = self._row_factory
+        return conn
+
+    def _end_transaction(self, commit: bool) -> None:
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            self._transaction_owner = None
+            if commit:
+                self._writer.commit()
+            else:
+                self._writer.rollback()
+
+    def _commit_unless_in_transaction(self) -> None:
+        if self._transaction_depth == 0:
+            self._writer.commit()
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import bcrypt
+
+# Leave one core free so dashboard renders are never starved by logins.
+# bcrypt releases the GIL while hashing, so threads use every worker core.
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Hashing jobs allowed to be running or waiting before new ones are refused
+DEFAULT_MAX_PENDING = 32
+
+# Seconds a caller waits for a free queue slot before giving up
+DEFAULT_QUEUE_TIMEOUT = 2.0
+
+# Calibrated cost factor, written by `python -m services.password_hasher`
+BCRYPT_CONFIG_PATH = Path("DATA") / "bcrypt.json"
+
+# Cost used until the host has been calibrated (bcrypt's own default)
+DEFAULT_ROUNDS = 12
+
+# Calibration picks the highest cost whose verify time stays within the
+# target, but never below MIN_ROUNDS however slow the host is
+TARGET_VERIFY_SECONDS = 0.25
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+
+class HasherBusyError(RuntimeError):
+    """Raised when the hashing queue stays full for longer than the timeout."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded worker pool.
+
+    Callers on the Streamlit script thread get the same blocking API as
+    calling bcrypt directly, plus futures and coroutines for code that can
+    overlap other work. At most `max_pending` jobs are queued; beyond that
+    callers wait up to `queue_timeout` seconds and then get HasherBusyError,
+    so a flood of login attempts is shed instead of piling up.
+
+    New hashes use `rounds`, the calibrated cost from BCRYPT_CONFIG_PATH
+    unless given explicitly.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS,
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+                 rounds: Optional[int] = None):
+        self.rounds = rounds if rounds is not None else load_rounds()
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._stats = {
+            "hash": {"calls": 0, "wait_s": 0.0, "run_s": 0.0, "max_run_s": 0.0},
+            "check": {"calls": 0, "wait_s": 0.0, "run_s": 0.0, "max_run_s": 0.0},
+        }
+        self._pending = 0
+        self._rejected = 0
+
+    # ---------- Blocking API ----------
+
+    def hash_password(self, plain: str, rounds: Optional[int] = None) -> str:
+        """Hash a plain-text password with a fresh salt (at `self.rounds` by default)."""
+        return self.submit_hash(plain, rounds).result()
+
+    def check_password(self, plain: str, hashed: str) -> bool:
+        """Return True if `plain` matches the bcrypt hash `hashed`."""
+        return self.submit_check(plain, hashed).result()
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True if `hashed` was made with a cost other than `self.rounds`."""
+        return hash_rounds(hashed) != self.rounds
+
+    # ---------- Futures API ----------
+
+    def submit_hash(self, plain: str, rounds: Optional[int] = None) -> Future:
+        """Queue a hash; the future resolves to the hash string."""
+        rounds = self.rounds if rounds is None else rounds
+        return self._submit("hash", lambda: bcrypt.hashpw(
+            plain.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8"))
+
+    def submit_check(self, plain: str, hashed: str) -> Future:
+        """Queue a verification; the future resolves to True or False."""
+        return self._submit("check", lambda: bcrypt.checkpw(
+            plain.encode("utf-8"), hashed.encode("utf-8")))
+
+    # ---------- Async API ----------
+
+    async def hash_password_async(self, plain: str, rounds: Optional[int] = None) -> str:
+        """Coroutine version of hash_password."""
+        return await asyncio.wrap_future(self.submit_hash(plain, rounds))
+
+    async def check_password_async(self, plain: str, hashed: str) -> bool:
+        """Coroutine version of check_password."""
+        return await asyncio.wrap_future(self.submit_check(plain, hashed))
+
+    # ---------- Metrics / lifecycle ----------
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Per operation ("hash", "check"): calls, mean and max run
+                time and mean queue wait in milliseconds; plus jobs pending
+                and calls rejected because the queue was full
+        """
+        with self._lock:
+            result = {"pending": self._pending, "rejected": self._rejected}
+            for operation, totals in self._stats.items():
+                calls = totals["calls"]
+                result[operation] = {
+                    "calls": calls,
+                    "mean_ms": 1000 * totals["run_s"] / calls if calls else 0.0,
+                    "max_ms": 1000 * totals["max_run_s"],
+                    "mean_wait_ms": 1000 * totals["wait_s"] / calls if calls else 0.0,
+                }
+            return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads once queued jobs have finished."""
+        self._executor.shutdown(wait=wait)
+
+    def _submit(self, operation: str, work) -> Future:
+        if not self._slots.acquire(timeout=self._queue_timeout):
+            with self._lock:
+                self._rejected += 1
+            raise HasherBusyError("Password hashing queue is full; try again shortly")
+
+        queued_at = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+
+        def run():
+            started = time.perf_counter()
+            try:
+                return work()
+            finally:
+                finished = time.perf_counter()
+                self._record(operation, started - queued_at, finished - started)
+
+        try:
+            return self._executor.submit(run)
+        except BaseException:
+            self._release()
+            raise
+
+    def _record(self, operation: str, wait_s: float, run_s: float) -> None:
+        with self._lock:
+            totals = self._stats[operation]
+            totals["calls"] += 1
+            totals["wait_s"] += wait_s
+            totals["run_s"] += run_s
+            totals["max_run_s"] = max(totals["max_run_s"], run_s)
+        self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+
+def hash_rounds(hashed: str) -> Optional[int]:
+    """Return the cost factor of a bcrypt hash ("$2b$12$..." -> 12), or None."""
+    parts = hashed.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def load_rounds(path: Path = BCRYPT_CONFIG_PATH) -> int:
+    """Return the calibrated cost from `path`, or DEFAULT_ROUNDS if uncalibrated."""
+    try:
+        with open(path) as f:
+            return int(json.load(f)["rounds"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return DEFAULT_ROUNDS
+
+
+def measure_verify_seconds(rounds: int, samples: int = 3) -> float:
+    """Return the fastest of `samples` checkpw timings at the given cost."""
+    hashed = bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds))
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.checkpw(b"calibration", hashed)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def calibrate_rounds(target_seconds: float = TARGET_VERIFY_SECONDS) -> tuple:
+    """
+    Benchmark this host and pick the bcrypt cost meeting a verify-time target.
+
+    Each extra round doubles the work, so costs are measured upwards from
+    MIN_ROUNDS until the next one would exceed the target.
+
+    Returns:
+        tuple: (rounds, measured verify seconds at that cost)
+    """
+    rounds = MIN_ROUNDS
+    seconds = measure_verify_seconds(rounds)
+    while rounds < MAX_ROUNDS and seconds * 2 <= target_seconds:
+        next_seconds = measure_verify_seconds(rounds + 1)
+        if next_seconds > target_seconds:
+            break
+        rounds, seconds = rounds + 1, next_seconds
+    return rounds, seconds
+
+
+def save_rounds(rounds: int, measured_seconds: float,
+                target_seconds: float = TARGET_VERIFY_SECONDS,
+                path: Path = BCRYPT_CONFIG_PATH) -> None:
+    """Write the calibrated cost and its benchmark to the config file."""
+    with open(path, "w") as f:
+        json.dump({
+            "rounds": rounds,
+            "target_ms": round(target_seconds * 1000),
+            "measured_ms": round(measured_seconds * 1000, 1),
+            "calibrated_at": datetime.now().isoformat(timespec="seconds"),
+        }, f, indent=2)
+
+
+def _hash_one(job) -> str:
+    plain, rounds = job
+    return bcrypt.hashpw(plain.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def hash_passwords(passwords, rounds: Optional[int] = None,
+                   workers: int = DEFAULT_WORKERS) -> list:
+    """
+    Hash many passwords at once on a dedicated process pool.
+
+    Meant for bulk provisioning: the work runs outside the shared login
+    hasher, so a large batch cannot fill its queue and lock users out.
+
+    Args:
+        passwords: Plain-text passwords
+        rounds: bcrypt cost (default: the calibrated cost)
+        workers: Worker processes
+
+    Returns:
+        list: Hash strings in the same order as `passwords`
+    """
+    rounds = load_rounds() if rounds is None else rounds
+    jobs = [(plain, rounds) for plain in passwords]
+    if len(jobs) <= 1 or workers <= 1:
+        return [_hash_one(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_hash_one, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+_default_hasher: Optional[PasswordHasher] = None
+_default_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Return the process-wide hasher, creating it on first use."""
+    global _default_hasher
+    with _default_lock:
+        if _default_hasher is None:
+            _default_hasher = PasswordHasher()
+        return _default_hasher
+
+
+def main():
+    """Calibrate the bcrypt cost for this host and save it to the config file."""
+    rounds, seconds = calibrate_rounds()
+    save_rounds(rounds, seconds)
+    print(f"✅ bcrypt cost {rounds} verifies in {seconds * 1000:.0f} ms "
+          f"(target {TARGET_VERIFY_SECONDS * 1000:.0f} ms); saved to {BCRYPT_CONFIG_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import re
+from collections import namedtuple
+
+# Account rules for bulk provisioning
+USERNAME_PATTERN = re.compile(r"^[A-Za-z0-9]{3,20}$")
+PASSWORD_MIN_LENGTH = 6
+PASSWORD_MAX_LENGTH = 50
+
+# Outcome of one record passed to register_users_bulk
+CREATED = "created"
+ALREADY_EXISTS = "already exists"
+INVALID = "invalid"
+ProvisionResult = namedtuple("ProvisionResult", ["username", "status", "detail"])
+
+# Usernames per IN (...) lookup, well under SQLite's parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+
+def validate_credentials(username, password):
+    """
+    Check a username and password against the account rules.
+
+    Returns:
+        str: Why the pair is rejected, or None if it is valid
+    """
+    if not username or not USERNAME_PATTERN.match(username):
+        return "username must be 3-20 letters or digits"
+    if not password or not PASSWORD_MIN_LENGTH <= len(password) <= PASSWORD_MAX_LENGTH:
+        return f"password must be {PASSWORD_MIN_LENGTH}-{PASSWORD_MAX_LENGTH} characters"
+    return None
+
+
+def classify_records(records, role="user"):
+    """
+    Validate provisioning records and drop duplicates within the batch.
+
+    Args:
+        records: Iterable of (username, password) or (username, password, role)
+            tuples, or dicts with those keys
+        role: Role for records that do not give one
+
+    Returns:
+        tuple: (results, pending) - `results` has one slot per record, already
+            filled with a ProvisionResult for rejected ones and None for the
+            rest; `pending` maps each accepted username to
+            (result index, password, role)
+    """
+    results = []
+    pending = {}
+    for record in records:
+        if isinstance(record, dict):
+            record = (record.get("username"), record.get("password"), record.get("role"))
+        username, password, user_role = (tuple(record) + (None, None, None))[:3]
+
+        problem = validate_credentials(username, password)
+        if problem:
+            results.append(ProvisionResult(username, INVALID, problem))
+        elif username in pending:
+            results.append(ProvisionResult(username, ALREADY_EXISTS, "duplicate in batch"))
+        else:
+            pending[username] = (len(results), password, user_role or role)
+            results.append(None)
+    return results, pending
+
+
+def username_lookups(usernames):
+    """
+    Yield (sql, params) queries that together select which of `usernames`
+    exist, LOOKUP_BATCH_SIZE names at a time. Each returns one username
+    column.
+    """
+    usernames = list(usernames)
+    for start in range(0, len(usernames), LOOKUP_BATCH_SIZE):
+        batch = usernames[start:start + LOOKUP_BATCH_SIZE]
+        placeholders = ", ".join("?" for _ in batch)
+        yield f"SELECT username FROM users WHERE username IN ({placeholders})", batch
@@ -0,0 +1,57 @@
+import csv
+import pytest
+from app.data.db import adopt_csv_file, connect_database, load_csv_incremental, transaction
+from app.data.incidents import insert_incident
+from app.data.schema import run_migrations
+
+INCIDENT_HEADER = ["date", "incident_type", "severity", "status", "description", "reported_by"]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect_database(tmp_path / "platform.db")
+    run_migrations(conn)
+    yield conn
+    conn.close()
+
+
+def write_incidents_csv(path, count):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(INCIDENT_HEADER)
+        for i in range(count):
+            writer.writerow(["2024-05-01", "Phishing", "Low", "Open", f"From CSV {i}", "loader"])
+    return path
+
+
+def incident_count(conn):
+    return conn.execute("SELECT COUNT(*) FROM cyber_incidents").fetchone()[0]
+
+
+def test_new_csv_loads_into_non_empty_table(conn, tmp_path):
+    insert_incident(conn, "2024-04-01", "Malware", "High", "Open", "Made in the dashboard")
+    csv_path = write_incidents_csv(tmp_path / "incidents.csv", 3)
+
+    assert load_csv_incremental(conn, csv_path, "cyber_incidents") == 3
+    assert incident_count(conn) == 4
+
+    # A second run finds the file unchanged
+    assert load_csv_incremental(conn, csv_path, "cyber_incidents") == 0
+    assert incident_count(conn) == 4
+
+
+def test_adopt_csv_file_only_records_files_already_in_the_table(conn, tmp_path):
+    csv_path = write_incidents_csv(tmp_path / "incidents.csv", 3)
+    insert_incident(conn, "2024-04-01", "Malware", "High", "Open", "Made in the dashboard")
+
+    # One row cannot hold a three-row file: it must still be loaded
+    with transaction(conn):
+        assert not adopt_csv_file(conn, csv_path, "cyber_incidents")
+    assert load_csv_incremental(conn, csv_path, "cyber_incidents") == 3
+
+    # A table filled from the file before the manifest existed is adopted
+    preloaded = write_incidents_csv(tmp_path / "preloaded.csv", 4)
+    with transaction(conn):
+        assert adopt_csv_file(conn, preloaded, "cyber_incidents")
+    assert load_csv_incremental(conn, preloaded, "cyber_incidents") == 0
+    assert incident_count(conn) == 4
@@ -0,0 +1,101 @@
+from pathlib import Path
+import pytest
+from app.data import datasets, incidents, tickets
+from app.data.db import connect_database, load_csv_to_table
+from app.data.query_plans import capture_queries, find_full_scans, full_scans
+from app.data.schema import run_migrations
+from app.data.trends import GRANULARITIES, TREND_DIMENSIONS
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "DATA"
+
+CSV_TABLES = ["cyber_incidents", "datasets_metadata", "it_tickets"]
+
+
+@pytest.fixture(params=[False, True], ids=["fresh", "analyzed"])
+def conn(request, tmp_path):
+    """
+    A fully migrated database holding the sample CSV data.
+
+    "fresh" loads the data after the migrations, as setup_database_complete
+    does; "analyzed" then refreshes the planner statistics, as a database
+    migrated with data already in it has.
+    """
+    conn = connect_database(tmp_path / "platform.db")
+    run_migrations(conn)
+    for table in CSV_TABLES:
+        load_csv_to_table(conn, DATA_DIR / f"{table}.csv", table)
+    if request.param:
+        conn.execute("ANALYZE")
+    yield conn
+    conn.close()
+
+
+def assert_index_backed(conn, func, *args):
+    statements = capture_queries(conn, func, *args)
+    assert statements
+    for sql in statements:
+        assert full_scans(conn, sql) == [], sql
+
+
+def test_dashboard_queries_are_index_backed(conn):
+    assert find_full_scans(conn) == {}
+
+
+def test_check_fails_when_a_filter_index_is_dropped(conn):
+    conn.execute("DROP INDEX idx_cyber_incidents_severity")
+    conn.execute("DROP INDEX idx_cyber_incidents_severity_status")
+
+    offenders = find_full_scans(conn)
+    assert any(name.startswith("get_incidents_page({'severity'") for name in offenders)
+
+    page_sql = capture_queries(conn, incidents.get_incidents_page, {"severity": "Critical"})
+    assert any(full_scans(conn, sql) == ["SCAN cyber_incidents"] for sql in page_sql)
+
+
+@pytest.mark.parametrize("get_page, filters, sort_by", [
+    (incidents.get_incidents_page, {}, "id"),
+    (incidents.get_incidents_page, {}, "date"),
+    (incidents.get_incidents_page, {"severity": "Critical"}, "id"),
+    (incidents.get_incidents_page, {"status": ["Open", "Investigating"]}, "id"),
+    (incidents.get_incidents_page, {"incident_type": "Phishing"}, "date"),
+    (incidents.get_incidents_page, {"severity": "High", "status": "Open"}, "id"),
+    (incidents.get_incidents_page, {"start": "2024-01-01", "end": "2024-06-30"}, "date"),
+    (tickets.get_tickets_page, {}, "created_date"),
+    (tickets.get_tickets_page, {"priority": ["Critical", "High"]}, "id"),
+    (tickets.get_tickets_page, {"status": "Resolved"}, "created_date"),
+    (tickets.get_tickets_page, {"category": "Network"}, "id"),
+    (tickets.get_tickets_page, {"assigned_to": "IT_Support_A"}, "id"),
+    (tickets.get_tickets_page, {"start": "2024-01-01", "end": "2024-06-30"}, "id"),
+    (datasets.get_datasets_page, {}, "last_updated"),
+    (datasets.get_datasets_page, {"category": "Cloud Logs"}, "id"),
+    (datasets.get_datasets_page, {"source": ["Internal", "External"]}, "last_updated"),
+    (datasets.get_datasets_page, {"start": "2024-01-01"}, "id"),
+])
+def test_explorer_pages_are_index_backed(conn, get_page, filters, sort_by):
+    first = get_page(conn, filters, sort_by, page_size=10)
+    assert_index_backed(conn, get_page, filters, sort_by, True, None, 10)
+    if first.next_cursor is not None:
+        assert_index_backed(conn, get_page, filters, sort_by, True, first.next_cursor, 10)
+
+
+@pytest.mark.parametrize("search, query", [
+    (incidents.search_incidents, "phishing"),
+    (incidents.search_incidents, "mal"),
+    (tickets.search_tickets, "issue number"),
+    (tickets.search_tickets, "desc"),
+])
+def test_search_is_index_backed(conn, search, query):
+    assert not search(conn, query).empty
+    assert_index_backed(conn, search, query)
+
+
+@pytest.mark.parametrize("get_trend, table", [
+    (incidents.get_incident_trend, "cyber_incidents"),
+    (tickets.get_ticket_trend, "it_tickets"),
+])
+@pytest.mark.parametrize("granularity", list(GRANULARITIES))
+def test_trends_are_index_backed(conn, get_trend, table, granularity):
+    for by in TREND_DIMENSIONS[table]:
+        assert_index_backed(conn, get_trend, granularity, None, None, by or None)
+        assert_index_backed(conn, get_trend, granularity, "2024-01-01", "2024-06-30",
+                            by or None)